@@ -11,13 +11,18 @@ bl_info = {
     "tracker_url": "",
     "category": "System"}
 
+import time
+
 import bpy
 from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ExportHelper
 
 # bl2030 packages
 
 class Runner:
     _instances = {}
+    # True while a timeline is baked; the frame changes of baking don't send anything
+    baking = False
 
     def instance_for(target):
         if target in Runner._instances:
@@ -31,6 +36,21 @@ class Runner:
         self.config = scene.bl2030cfg
         self.osc_sender = self._get_osc_sender()
         self._object_wrappers = None
+        # cached (object wrapper, property wrappers) of all relevant objects, see relevant_wrappers
+        self._index = None
+        self._index_object_count = None
+        # True between the frame_change_pre and frame_change_post handlers; the scene
+        # updates of a frame change only update animated values (see scene_updated)
+        self.changing_frame = False
+        # when True, the next update reads all properties (also with the ANIMATED change detection)
+        self._poll_all = True
+        # True when float changes were held back by a deadband or max rate (see send_pending)
+        self.has_pending = False
+        # True when the last frame change was part of animation playback
+        self.played = False
+        # the number of datagrams and bytes sent for the last frame change
+        self.packets_per_frame = 0
+        self.bytes_per_frame = 0
 
     def send_obj_props(self, object, recursive=False):
         sender = self.sender()
@@ -65,7 +85,36 @@ class Runner:
         return osc_sender
 
     def update(self):
+        self.played = is_animation_playing()
+        self._send_batch(self._send_changes)
+        # blender 2.80+ doesn't update the scene when playback stops, so a timer
+        # waits for that to send the held values (see pendingTimer)
+        if self.has_pending and self.played and hasattr(bpy.app, 'timers') and not bpy.app.timers.is_registered(pendingTimer):
+            bpy.app.timers.register(pendingTimer, first_interval=PENDING_CHECK_INTERVAL)
+
+    # calls send_fn with the sender, packs the messages it sends into bundles (with the bundle option)
+    # and stores the number of datagrams and bytes; with reset_counters False, these are added
+    # to the numbers of the last frame change
+    def _send_batch(self, send_fn, reset_counters=True):
         sender = self.sender()
+        if reset_counters:
+            sender.reset_counters()
+
+        # pack all messages into bundles, with the current time as timetag
+        if self.config.bundle:
+            sender.configure({'mtu': self.config.mtu})
+            sender.begin_bundle()
+
+        try:
+            send_fn(sender)
+        finally:
+            if self.config.bundle:
+                sender.end_bundle()
+
+        self.packets_per_frame = sender.packets
+        self.bytes_per_frame = sender.bytes
+
+    def _send_changes(self, sender):
         # check if we reached any of the markers,
         # if so, emit and OSC message
         cur_frame = self.scene.frame_current
@@ -75,14 +124,29 @@ class Runner:
                 if self.config.verbose:
                     print(' - OSC from marker: '+marker.name)
 
+        index = self.relevant_wrappers()
+        # only the animated/driven properties can change during playback, unless the
+        # scene was changed (see scene_updated) or the ANIMATED change detection is off
+        poll_all = self.config.change_detection != 'ANIMATED' or self._poll_all
+        self._poll_all = False
+        now = time.time()
+        self.has_pending = False
+
         # check for each property wrapper if the value changed,
         # if so; emit an OSC message
-        for ow in self.object_wrappers():
+        for ow, propwraps, animated_propwraps in index:
             if ow.obj.hide:
                 continue
 
-            for propwrap in ow.property_wrappers():
-                val = propwrap.update()
+            for propwrap in (propwraps if poll_all else animated_propwraps):
+                try:
+                    val = propwrap.update(now)
+                except KeyError:
+                    # the property was removed
+                    self.invalidate_index()
+                    continue
+                if val == None and propwrap.is_pending():
+                    self.has_pending = True
                 #print('checking '+propwrap.property_name+": "+str(val)+" (prev val: "+str(propwrap.prev_value)+")")
                 if val != None:
                     addr = ow.osc_prefix() + propwrap.property_name
@@ -90,6 +154,83 @@ class Runner:
                     if self.config.verbose:
                         print(' - OSC from property: {0} {1}'.format(addr, str(val)))
 
+    # walks the scene's frame range once and writes all the messages the runner would send
+    # during playback (with the time since the first frame) to a timeline file, that can be
+    # played back without blender (see osc_timeline); the first frame has all property values.
+    # Returns the number of messages in the timeline
+    def bake_timeline(self, path):
+        from osc_sender import build_message
+        from osc_timeline import write_timeline
+
+        scene = self.scene
+        fps = scene.render.fps / scene.render.fps_base
+        original_frame = scene.frame_current
+        previous_values = {}
+        events = []
+
+        Runner.baking = True
+        try:
+            for frame in range(scene.frame_start, scene.frame_end + 1):
+                scene.frame_set(frame)
+                t = (frame - scene.frame_start) / fps
+
+                for marker in scene.timeline_markers:
+                    if marker.frame == frame and marker.name.startswith('/'):
+                        events.append((t, build_message(marker.name).dgram))
+
+                for ow, propwraps, animated_propwraps in self.relevant_wrappers():
+                    if ow.obj.hide:
+                        continue
+
+                    for propwrap in propwraps:
+                        addr = ow.osc_prefix() + propwrap.property_name
+                        val = propwrap.get_current_value()
+                        if addr not in previous_values or previous_values[addr] != val:
+                            previous_values[addr] = val
+                            events.append((t, build_message(addr, [val]).dgram))
+        finally:
+            Runner.baking = False
+            scene.frame_set(original_frame)
+
+        write_timeline(path, fps, events, duration=(scene.frame_end - scene.frame_start + 1) / fps)
+        return len(events)
+
+    # sends the final values of float properties that were held back by their deadband or max rate,
+    # after playback stopped; without playback (stepping, scrubbing, rendering), held values are sent
+    # by the next frame change that leaves them unchanged (see PropertyWrapper.changed_value)
+    def send_pending(self):
+        self.has_pending = False
+        if self._index is None:
+            return
+        self._send_batch(self._send_pending, reset_counters=False)
+
+    def _send_pending(self, sender):
+        now = time.time()
+        for ow, propwraps, animated_propwraps in self._index:
+            for propwrap in propwraps:
+                if not propwrap.is_pending():
+                    continue
+                try:
+                    val = propwrap.update(now)
+                except KeyError:
+                    self.invalidate_index()
+                    return
+                if val != None:
+                    sender.send(ow.osc_prefix() + propwrap.property_name, [val])
+
+    # gives the (deadband, minimum seconds between messages) for the float values sent to an address;
+    # the send rule with the longest prefix of the address overrides the scene-wide settings
+    def send_limits(self, addr):
+        deadband = self.config.deadband
+        max_rate = self.config.max_rate
+        match = ''
+        for rule in self.config.send_rules:
+            if rule.prefix and addr.startswith(rule.prefix) and len(rule.prefix) > len(match):
+                match = rule.prefix
+                deadband = rule.deadband
+                max_rate = rule.max_rate
+        return deadband, (1.0 / max_rate if max_rate > 0 else 0.0)
+
     def object_wrappers(self):
         result = []
         for obj in self.scene.objects:
@@ -98,6 +239,34 @@ class Runner:
                 result.append(objwrap)
         return result
 
+    # gives a list with an (object wrapper, property wrappers, animated property wrappers) tuple
+    # for every relevant object; the list is cached, and only rebuilt when objects are added/removed
+    # or the index was invalidated (see scene_updated), so the scene's objects aren't scanned every frame
+    def relevant_wrappers(self):
+        if self._index is None or self._index_object_count != len(self.scene.objects):
+            self._index = []
+            for ow in self.object_wrappers():
+                propwraps = ow.property_wrappers()
+                for propwrap in propwraps:
+                    propwrap.deadband, propwrap.min_interval = self.send_limits(ow.osc_prefix() + propwrap.property_name)
+                animated = ow.animated_prop_names()
+                self._index.append((ow, propwraps, [pw for pw in propwraps if pw.property_name in animated]))
+            self._index_object_count = len(self.scene.objects)
+            self._poll_all = True
+        return self._index
+
+    def invalidate_index(self):
+        self._index = None
+        self._poll_all = True
+
+    # called when blender updated the scene, outside of the frame changes this runner handled
+    # (objects or their properties might have been added, removed or renamed)
+    def scene_updated(self):
+        # frame changes update animated objects as well, which doesn't change which objects are relevant
+        if self.changing_frame or is_animation_playing():
+            return
+        self.invalidate_index()
+
 class ObjectWrapper:
     _instances = {}
 
@@ -140,6 +309,23 @@ class ObjectWrapper:
                 prop_names.append(prop_name)
         return prop_names
 
+    # gives the names of the / properties that have an F-curve in the object's action or a driver
+    def animated_prop_names(self):
+        anim = self.obj.animation_data
+        if anim is None:
+            return set()
+
+        fcurves = list(anim.drivers)
+        if anim.action:
+            fcurves.extend(anim.action.fcurves)
+        data_paths = set([fcurve.data_path for fcurve in fcurves])
+
+        result = set()
+        for prop_name in self.prop_names():
+            if '["{0}"]'.format(prop_name) in data_paths or "['{0}']".format(prop_name) in data_paths:
+                result.add(prop_name)
+        return result
+
     def property_wrappers(self):
         result = []
         for prop_name in self.prop_names():
@@ -168,23 +354,45 @@ class PropertyWrapper:
     def __init__(self, obj, property_name):
         self.obj = obj
         self.property_name = property_name
+        # the last sent value
         self.prev_value = self.get_current_value()
+        # the value of the last update, sent or not
+        self.last_value = self.prev_value
+        self.sent_time = None
+        # float changes within the deadband of the last sent value aren't sent,
+        # and float values aren't sent more often than every min_interval seconds (see Runner.send_limits)
+        self.deadband = 0.0
+        self.min_interval = 0.0
 
     def get_current_value(self):
         return self.obj[self.property_name]
 
-    def changed_value(self):
+    # gives the current value if it should be sent; float changes that are held back by the
+    # deadband or min_interval are sent anyway once the value stops changing, so the
+    # last sent value always ends up being the final value
+    def changed_value(self, now=None):
         cur = self.get_current_value()
-        if cur != self.prev_value:
-            return cur
-        return None
-
-    def update(self):
-        changed = self.changed_value()
+        settled = cur == self.last_value
+        self.last_value = cur
+        if cur == self.prev_value:
+            return None
+        if not settled and isinstance(cur, float) and isinstance(self.prev_value, float):
+            if abs(cur - self.prev_value) <= self.deadband:
+                return None
+            if now is not None and self.sent_time is not None and now - self.sent_time < self.min_interval:
+                return None
+        return cur
+
+    def update(self, now=None):
+        changed = self.changed_value(now)
         if changed != None:
             self.prev_value = changed
+            self.sent_time = now
         return changed
 
+    def is_pending(self):
+        return self.last_value != self.prev_value
+
 #
 # bl2030 add-on stuff
 #
@@ -204,14 +412,47 @@ class Panel(bpy.types.Panel):
 
         layout.row().operator("object.bl2030sendobjprops", text="Send all object's properties")
         layout.row().operator("object.bl2030sendobjfamilyprops", text="Send all object and children's properties")
+        layout.row().operator("object.bl2030refreshindex", text="Refresh OSC properties")
+        layout.row().operator("object.bl2030baketimeline", text="Bake OSC timeline")
         layout.row().prop(config, "host")
         layout.row().prop(config, "port")
         # layout.row().prop(config, "live_update")
         layout.row().prop(config, "verbose")
+        layout.row().prop(config, "change_detection")
+        layout.row().prop(config, "bundle")
+        if config.bundle:
+            layout.row().prop(config, "mtu")
+        layout.row().prop(config, "deadband")
+        layout.row().prop(config, "max_rate")
+
+        layout.row().label(text="Send rules:")
+        for idx, rule in enumerate(config.send_rules):
+            row = layout.row()
+            row.prop(rule, "prefix", text="")
+            row.prop(rule, "deadband")
+            row.prop(rule, "max_rate")
+            row.operator("object.bl2030removesendrule", text="", icon='X').index = idx
+        layout.row().operator("object.bl2030addsendrule", text="Add send rule")
+
+        runner = Runner._instances.get(context.scene)
+        if runner:
+            layout.row().label(text="Last frame: {0} packets, {1} bytes".format(runner.packets_per_frame, runner.bytes_per_frame))
 
 
         #layout.row().label('Last Messages:\n'+config.last_messages)
 
+def send_limits_updated(self, context):
+    if context.scene in Runner._instances:
+        Runner._instances[context.scene].invalidate_index()
+
+# The deadband and max rate of the float properties with OSC addresses that start with a prefix
+class SendRule(bpy.types.PropertyGroup):
+  @classmethod
+  def register(cls):
+    cls.prefix = bpy.props.StringProperty(name="Prefix", default="/", description="The rule applies to the OSC addresses that start with this prefix (the longest matching prefix wins)", update=send_limits_updated)
+    cls.deadband = bpy.props.FloatProperty(name="Deadband", default=0.0, min=0.0, precision=4, description="Changes smaller than this aren't sent, until the value stops changing", update=send_limits_updated)
+    cls.max_rate = bpy.props.FloatProperty(name="Max rate", default=0.0, min=0.0, description="Maximum number of messages per second (0 is unlimited); the final value is sent when the value stops changing", update=send_limits_updated)
+
 # This class represents the bl2030 config data (that the UI Panel interacts with)
 class Config(bpy.types.PropertyGroup):
   @classmethod
@@ -227,6 +468,14 @@ class Config(bpy.types.PropertyGroup):
     cls.host = bpy.props.StringProperty(name="Host", default="127.0.0.1")
     # cls.live_update = bpy.props.BoolProperty(name="live_update", default=False)
     cls.verbose = bpy.props.BoolProperty(name="verbose", default=False)
+    cls.change_detection = bpy.props.EnumProperty(name="Change detection", default='POLL', description="Which properties to check for changes on every frame", items=[
+      ('POLL', "All properties", "Read all / properties on every frame"),
+      ('ANIMATED', "Animated properties", "Only read the / properties with F-curves (in the object's active action) or drivers; all properties are read again after changes to the scene")])
+    cls.bundle = bpy.props.BoolProperty(name="Bundle messages", default=False, description="Send all messages of a frame change in OSC bundles, with the time of the frame change as timetag")
+    cls.mtu = bpy.props.IntProperty(name="MTU", default=1500, min=576, soft_max=9000, description="Maximum size (in bytes) of the IP packets with bundles")
+    cls.deadband = bpy.props.FloatProperty(name="Deadband", default=0.0, min=0.0, precision=4, description="Changes of float properties smaller than this aren't sent, until the value stops changing", update=send_limits_updated)
+    cls.max_rate = bpy.props.FloatProperty(name="Max rate", default=0.0, min=0.0, description="Maximum number of messages per second for every float property (0 is unlimited); the final value is sent when the value stops changing", update=send_limits_updated)
+    cls.send_rules = bpy.props.CollectionProperty(type=SendRule, name="Send rules", description="Deadband and max rate for the properties with specific OSC addresses")
     # cls.last_messages = bpy.props.StringProperty(name="Last Messages", default="")
 
 
@@ -244,6 +493,66 @@ class Bl2030ObjPropsSender(bpy.types.Operator):
         Runner.instance_for(context.scene).send_obj_props(context.object)
         return {'FINISHED'}
 
+class Bl2030RefreshIndex(bpy.types.Operator):
+    """Look for objects with OSC properties again"""
+    bl_idname = "object.bl2030refreshindex"
+    bl_label = "Refresh OSC properties"
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene
+
+    def execute(self, context):
+        Runner.instance_for(context.scene).invalidate_index()
+        return {'FINISHED'}
+
+class Bl2030BakeTimeline(bpy.types.Operator, ExportHelper):
+    """Write the OSC messages of the scene's frame range to a timeline file"""
+    bl_idname = "object.bl2030baketimeline"
+    bl_label = "Bake OSC timeline"
+
+    filename_ext = ".osct"
+    filter_glob = bpy.props.StringProperty(default="*.osct", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene
+
+    def execute(self, context):
+        count = Runner.instance_for(context.scene).bake_timeline(self.filepath)
+        self.report({'INFO'}, "Baked {0} OSC messages to {1}".format(count, self.filepath))
+        return {'FINISHED'}
+
+class Bl2030AddSendRule(bpy.types.Operator):
+    """Add a deadband and max rate for the properties with an OSC address prefix"""
+    bl_idname = "object.bl2030addsendrule"
+    bl_label = "Add send rule"
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene
+
+    def execute(self, context):
+        context.scene.bl2030cfg.send_rules.add()
+        send_limits_updated(self, context)
+        return {'FINISHED'}
+
+class Bl2030RemoveSendRule(bpy.types.Operator):
+    """Remove the send rule"""
+    bl_idname = "object.bl2030removesendrule"
+    bl_label = "Remove send rule"
+
+    index = bpy.props.IntProperty()
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene
+
+    def execute(self, context):
+        context.scene.bl2030cfg.send_rules.remove(self.index)
+        send_limits_updated(self, context)
+        return {'FINISHED'}
+
 class Bl2030ObjFamilyPropsSender(bpy.types.Operator):
     """Tooltip"""
     bl_idname = "object.bl2030sendobjfamilyprops"
@@ -258,17 +567,75 @@ class Bl2030ObjFamilyPropsSender(bpy.types.Operator):
         Runner.instance_for(context.scene).send_obj_props(context.object, True)
         return {'FINISHED'}
 
+def is_animation_playing():
+    screen = bpy.context.screen
+    if screen is not None:
+        return screen.is_animation_playing
+    # timers run without a screen in their context
+    window_manager = bpy.context.window_manager
+    return window_manager is not None and any(window.screen.is_animation_playing for window in window_manager.windows)
+
+# seconds between the checks of pendingTimer
+PENDING_CHECK_INTERVAL = 0.1
+
+def pendingTimer():
+    # sends the values held back during playback once it stopped; returning None unregisters the timer
+    if is_animation_playing():
+        return PENDING_CHECK_INTERVAL
+    for runner in list(Runner._instances.values()):
+        if runner.has_pending and runner.played:
+            runner.send_pending()
+    return None
+
 @persistent
 def frameHandler(scene):
-    Runner.instance_for(scene).update()
+    runner = Runner.instance_for(scene)
+    runner.changing_frame = True
+    if Runner.baking:
+        return
+    runner.update()
+
+@persistent
+def frameChangePostHandler(scene):
+    if scene in Runner._instances:
+        Runner._instances[scene].changing_frame = False
+
+@persistent
+def sceneUpdateHandler(scene, *args):
+    # blender 2.7x updates the scene when playback stops (2.80+ uses pendingTimer)
+    runner = Runner._instances.get(scene)
+    if runner and runner.has_pending and runner.played and not runner.changing_frame and not is_animation_playing():
+        runner.send_pending()
+
+    # blender 2.7x calls scene_update_post for every update (also when nothing changed)
+    if not getattr(bpy.data.objects, 'is_updated', True):
+        return
+    if scene in Runner._instances:
+        Runner._instances[scene].scene_updated()
+
+@persistent
+def loadHandler(*args):
+    for runner in Runner._instances.values():
+        runner.invalidate_index()
+
+# the handler for scene updates is called depsgraph_update_post since blender 2.80
+SCENE_UPDATE_HANDLER = 'depsgraph_update_post' if hasattr(bpy.app.handlers, 'depsgraph_update_post') else 'scene_update_post'
 
 def register():
   bpy.utils.register_module(__name__)
   bpy.app.handlers.frame_change_pre.append(frameHandler)
+  bpy.app.handlers.frame_change_post.append(frameChangePostHandler)
+  getattr(bpy.app.handlers, SCENE_UPDATE_HANDLER).append(sceneUpdateHandler)
+  bpy.app.handlers.load_post.append(loadHandler)
 
 def unregister():
   bpy.utils.unregister_module(__name__)
   bpy.app.handlers.frame_change_pre.remove(frameHandler)
+  bpy.app.handlers.frame_change_post.remove(frameChangePostHandler)
+  getattr(bpy.app.handlers, SCENE_UPDATE_HANDLER).remove(sceneUpdateHandler)
+  bpy.app.handlers.load_post.remove(loadHandler)
+  if hasattr(bpy.app, 'timers') and bpy.app.timers.is_registered(pendingTimer):
+    bpy.app.timers.unregister(pendingTimer)
 
 if __name__ == "__main__":
   # register()
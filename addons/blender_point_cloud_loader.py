@@ -12,15 +12,46 @@ bl_info = {
 
 # system stuff
 import logging
+import time
+import numpy
+import concurrent.futures
+from collections import OrderedDict
 # blender stuff
 import bpy
 from bpy.app.handlers import persistent
 import bmesh
 import os.path
 import mathutils
+from bpy_extras.io_utils import ExportHelper
+# bladdons modules; these have to be installed next to the addon (see the README)
+try:
+  import point_cloud_formats
+  import point_cloud_frames
+  from point_cloud_frames import PointCloudFrameFile, PointCloudSpatialIndex, PointCloudLoadTimings, PointCloudGridMesher, PointCloudFrameCache
+except ImportError as err:
+  raise ImportError("The Point Cloud Loader needs the modules in addons/modules; copy them into blender's scripts/addons/modules directory ({0})".format(err))
+
+# per-frame messages are logged at the debug level; see the Log level setting in the panel,
+# which applies to the messages of the frame files (point_cloud_frames) as well
+logger = logging.getLogger(__name__)
+LOGGERS = (logger, point_cloud_frames.logger)
+for moduleLogger in LOGGERS:
+  if len(moduleLogger.handlers) == 0:
+    moduleLogger.addHandler(logging.StreamHandler())
+    moduleLogger.propagate = False
+  moduleLogger.setLevel(logging.WARNING)
 
 # Scene updates
 class PointCloudLoader:
+  _executor = None
+  WORKERS = 8
+
+  # gives the (shared) pool of threads that read and parse the files of all objects concurrently
+  def executor():
+    if PointCloudLoader._executor == None:
+      PointCloudLoader._executor = concurrent.futures.ThreadPoolExecutor(max_workers=PointCloudLoader.WORKERS)
+    return PointCloudLoader._executor
+
   def __init__(self, scene=None):
     self.scene=scene
 
@@ -33,12 +64,41 @@ class PointCloudLoader:
 
   # loads the current frame for all point-cloud-enabled objects in the scene
   def loadFrame(self, force=False):
+    with PointCloudLoadTimings.instance().measure('frame'):
+      self._loadFrame(force)
+
+  def _loadFrame(self, force):
     objs = self.enabledObjects()
-    print("Number of point cloud objects: {0}".format(len(objs)))
+    logger.debug("Number of point cloud objects: {0}".format(len(objs)))
+
+    # find out which files to load for the current frame for all point-cloud-enabled objects in the scene
+    loaders = [ObjectPointObjectLoader(obj, scene=self.scene, force=force) for obj in objs]
+    files = [loader.prepareFrame() for loader in loaders]
+
+    # read and parse the files of all objects concurrently;
+    # objects that load the same file with the same settings share a single load
+    pending = OrderedDict()
+    for file in files:
+      if file != None and file.loaded != True and file.key() not in pending:
+        pending[file.key()] = file
 
-    # load point clouds for the current frame for all point-cloud-enabled objects in the scene
-    for obj in objs:
-      ObjectPointObjectLoader(obj, scene=self.scene, force=force).loadFrame()
+    if len(pending) == 1:
+      loaded = {key: file.load() for key, file in pending.items()}
+    else:
+      futures = {key: PointCloudLoader.executor().submit(file.load) for key, file in pending.items()}
+      loaded = {key: future.result() for key, future in futures.items()}
+
+    # mesh operations have to run on the main thread, one object at a time;
+    # delta updates already wrote their vertices in prepareFrame
+    meshes = [loader.deltaMesh for loader in loaders if loader.deltaMesh != None]
+    for loader, file in zip(loaders, files):
+      if file != None:
+        meshes.append(loader.applyFrame(loaded.get(file.key(), file)))
+
+    # tag the changed meshes for an update once, instead of re-evaluating the scene for every object
+    with PointCloudLoadTimings.instance().measure('mesh update'):
+      for mesh in meshes:
+        PointCloudObjectFrameLoader.updateMesh(mesh)
 # end of class PointCloudLoader
 
 
@@ -48,6 +108,8 @@ class ObjectPointObjectLoader:
     self.obj = obj
     self.config = obj.pointCloudLoaderConfig
     self.force=force
+    # the mesh that prepareFrame changed with a delta update, which still needs an update
+    self.deltaMesh = None
 
     self.scene=scene
     if self.scene == None: # default to currently active scene
@@ -55,31 +117,78 @@ class ObjectPointObjectLoader:
 
   # load point cloud for the current frame for the specified object
   def loadFrame(self):
-    print("Loading point cloud for object: " + self.obj.name)
+    file = self.prepareFrame()
+    if file != None:
+      PointCloudObjectFrameLoader.updateMesh(self.applyFrame(file.load()))
+    else:
+      PointCloudObjectFrameLoader.updateMesh(self.deltaMesh)
+
+  # gives a file parser instance for the current frame, which might already be loaded
+  # (when it was cached or prefetched), or None if the current frame doesn't need loading.
+  # The returned file can be loaded on any thread, before it's passed to applyFrame.
+  def prepareFrame(self):
+    logger.debug("Loading point cloud for object: " + self.obj.name)
+    timings = PointCloudLoadTimings.instance()
 
     # get file path, create file parser instance
-    path = ObjectFileManager(self.obj).frameFilePath(self.scene.frame_current)
+    with timings.measure('path'):
+      fileManager = ObjectFileManager(self.obj)
+      fnumber = fileManager.getPointCloudFrameNumber(self.scene.frame_current)
+      path = fileManager.pathForPointCloudFrame(fnumber)
     if path == None:
-      print("Couldn't find point cloud frame file, aborting")
+      logger.warning("Couldn't find point cloud frame file, aborting")
       return
 
-    if self.force != True and self.config.currentFrameLoaded == path:
-      print("Current point cloud frame already loaded, aborting")
+    frameId = fileManager.frameIdentifier(fnumber)
+    if self.lodDivisor() > 1:
+      frameId += "@1/{0}".format(self.lodDivisor())
+
+    if self.force != True and self.config.currentFrameLoaded == frameId:
+      logger.debug("Current point cloud frame already loaded, aborting")
       return
 
-    file = PointCloudFrameFile(path=path, skip=self.config.skipPoints)
-    if self.config.bounds == True:
-      file.minBounds = self.config.boundsMin
-      file.maxBounds = self.config.boundsMax
+    if self.config.deltaUpdates == True and fileManager.isDeltaContainer():
+      # only update the vertices that changed; no need to load the complete frame
+      self.deltaMesh = PointCloudDeltaUpdater(self.obj, scene=self.scene).update(fileManager.container(), fnumber, self.frameFile(fileManager, fnumber))
+      self.config.currentFrameLoaded = frameId
+      return None
+
+    # the mesh won't have the vertices of the delta updater's last frame anymore
+    PointCloudDeltaUpdater._states.pop(self.obj.name, None)
 
-    if self.config.modify:
-      file.offset = self.config.vertOffset
-      file.multiply = self.config.vertMultiply
+    file = self.frameFile(fileManager, fnumber)
+    cache = PointCloudFrameCache.instance()
+    cache.setBudget(self.scene.pointCloudLoaderSceneConfig.cacheSize)
+
+    # use the cached (and already parsed) file if there is one
+    cached = cache.get(file)
+
+    if self.config.prefetch == True:
+      prefetcher = PointCloudFramePrefetcher.instance()
+      # use the prefetched (and already parsed) file if there is one
+      if cached == None:
+        cached = prefetcher.take(file)
+      # start loading the upcoming (uncached) frames in the background
+      prefetcher.prefetch(self.obj.name, [f for f in self.upcomingFrameFiles(fileManager) if cache.contains(f) != True])
+
+    self.frameId = frameId
+    self.crop = self.cropBounds(fileManager, fnumber, file)
+    return cached or file
+
+  # creates the point cloud mesh from a loaded file parser instance (given by prepareFrame);
+  # returns the changed mesh, which still needs an update (see PointCloudObjectFrameLoader.updateMesh)
+  def applyFrame(self, file):
+    points, indices = self.framePoints(file, self.crop, self.lodDivisor())
+    # after framePoints, which adds the level of detail and spatial index to the file's size
+    PointCloudFrameCache.instance().put(file)
 
     # create mesh generator instance, feed it the points form the file parser
-    pcofl = PointCloudObjectFrameLoader(self.obj, file.get_points(), scene=self.scene)
+    pcofl = PointCloudObjectFrameLoader.instance_for(self.obj, scene=self.scene)
+    pcofl.points = points
 
-    if self.obj.pointCloudLoaderConfig.skin == True:
+    # the skinner gets a new container object for every frame, unless the existing container object is reused,
+    # in which case createPoints clears the faces of the previous frame (the built-in grid method always reuses it)
+    if self.obj.pointCloudLoaderConfig.skin == True and self.config.skinMethod == 'SKINNER' and self.config.reuseContainer != True:
       pcofl.removeExisting()
 
     # pcofl.removeFaces()
@@ -87,29 +196,119 @@ class ObjectPointObjectLoader:
     pcofl.createPoints()
     # "skin" the mesh if the skin flag is enabled
     if self.obj.pointCloudLoaderConfig.skin == True:
-      self._skinObject(pcofl.getContainerObject())
+      with PointCloudLoadTimings.instance().measure('skin'):
+        if self.config.skinMethod == 'GRID':
+          self._meshGrid(pcofl, points, indices)
+        else:
+          # the skinner works with the evaluated mesh
+          PointCloudObjectFrameLoader.updateMesh(pcofl.getMesh())
+          self._skinObject(pcofl.getContainerObject())
 
-      if self.config.materialName != None and self.config.materialName != '':
-        materialiser = PointCloudMeshMaterialiser(obj=pcofl.getContainerObject(), materialName=self.config.materialName)
-        materialiser.applyMaterial()
+        if self.config.materialName != None and self.config.materialName != '':
+          materialiser = PointCloudMeshMaterialiser(obj=pcofl.getContainerObject(), materialName=self.config.materialName)
+          materialiser.applyMaterial()
 
     # done, store the path to the point-cloud-data file in the object's config, so
     # we know we don't have to load it again if the same file is specified
-    self.obj.pointCloudLoaderConfig.currentFrameLoaded = path
+    self.obj.pointCloudLoaderConfig.currentFrameLoaded = self.frameId
+    return pcofl.getMesh()
+
+  # gives the (points, indices) of the active points of a loaded file for the specified level of detail,
+  # cropped to the crop box (given by cropBounds) before they're decimated
+  def framePoints(self, file, crop, divisor=1):
+    if crop == None:
+      return file.get_points_array(divisor), file.get_point_indices(divisor)
+
+    with PointCloudLoadTimings.instance().measure('crop'):
+      return file.get_cropped_points(crop[0], crop[1], divisor)
+
+  # gives the level of detail to load as a divisor of the number of points;
+  # a coarse level can be used for playback, but renders always use all points
+  def lodDivisor(self):
+    if isRendering():
+      return 1
+    return {'FULL': 1, 'QUARTER': 4, 'SIXTEENTH': 16}.get(self.config.lodPlayback, 1)
+
+  # creates a (not yet loaded) file parser instance for the specified point cloud frame,
+  # configured with the object's load-time settings. The settings are copied into plain
+  # python values, so the file can safely be loaded outside of the main thread.
+  def frameFile(self, fileManager, fnumber):
+    file = PointCloudFrameFile(path=fileManager.pathForPointCloudFrame(fnumber), skip=self.config.skipPoints, frame=fileManager.containerFrameNumber(fnumber))
+    if self.config.modify:
+      file.offset = tuple(self.config.vertOffset)
+      file.multiply = tuple(self.config.vertMultiply)
+
+    if self.config.decimation != 'NONE':
+      file.decimation = self.config.decimation
+      file.voxelSize = self.config.voxelSize
+      file.decimationRatio = self.config.decimationRatio
+      file.targetPoints = self.config.targetPoints
+
+    # the bounds aren't a load-time setting of the file (see cropBounds), so changing them doesn't need a re-parse
+    return file
+
+  # gives the (minimum, maximum) box to crop the loaded points of the specified frame to, or None
+  def cropBounds(self, fileManager, fnumber, file):
+    if self.config.bounds != True:
+      return None
+
+    minimum, maximum = tuple(self.config.boundsMin), tuple(self.config.boundsMax)
+
+    # no need to crop when (according to the sequence's metadata) all points of the frame are inside the bounds
+    frameBounds = fileManager.frameBounds(fnumber)
+    if frameBounds != None:
+      lo, hi = file.transformBounds(*frameBounds)
+      if (lo >= numpy.array(minimum)).all() and (hi <= numpy.array(maximum)).all():
+        return None
+
+    return (minimum, maximum)
+
+  # gives file parser instances for the point cloud frames that will (probably) be needed next;
+  # the lookahead follows the playback direction and the frameRatio setting
+  def upcomingFrameFiles(self, fileManager):
+    # the point cloud frame is keyframed; we can't predict which frames are next
+    if self.config.pointCloudFrame != -1:
+      return []
+
+    direction = PointCloudFramePrefetcher.instance().direction(self.obj.name, self.scene.frame_current)
+    fnumbers = [fileManager.getPointCloudFrameNumber(self.scene.frame_current)]
+    result = []
+
+    # several scene frames can map to the same point cloud frame (frameRatio < 1.0),
+    # so look at (a limited number of) scene frames until we've found enough different point cloud frames
+    for step in range(1, self.config.prefetchFrames * 10 + 1):
+      if len(result) >= self.config.prefetchFrames:
+        break
+
+      fnumber = fileManager.getPointCloudFrameNumber(self.scene.frame_current + direction * step)
+      if fnumber != None and fnumber not in fnumbers:
+        fnumbers.append(fnumber)
+        result.append(self.frameFile(fileManager, fnumber))
+
+    return result
 
   def removeExisting(self):
-    PointCloudObjectFrameLoader(self.obj, scene=self.scene).removeExisting()
+    PointCloudObjectFrameLoader.instance_for(self.obj, scene=self.scene).removeExisting()
 
   def canSkin(self):
     return hasattr(self.scene, 'CONFIG_PointCloudSkinner')
 
+  # creates faces between the points that are neighbours in the depth image they were recorded from
+  def _meshGrid(self, pcofl, points, indices):
+    if indices is None:
+      logger.warning("Can't mesh point cloud; the frame file doesn't have an idx column")
+      return
+
+    mesher = PointCloudGridMesher(width=self.config.gridWidth, maxEdgeLength=self.config.maxEdgeLength)
+    pcofl.createFaces(mesher.triangles(points, indices))
+
   def _skinObject(self, obj):
     if self.canSkin() != True:
-      print("Can't skin point cloud mesh; scene doesn't have CONFIG_PointCloudSkinner attribute. ")
-      print("Please install and enable Point Cloud Skinner addon. See http://sourceforge.net/projects/pointcloudskin/")
+      logger.warning("Can't skin point cloud mesh; scene doesn't have CONFIG_PointCloudSkinner attribute. "
+        + "Please install and enable Point Cloud Skinner addon. See http://sourceforge.net/projects/pointcloudskin/")
       return
 
-    print("Skinning mesh")
+    logger.debug("Skinning mesh")
 
     originalSkinObject = self.scene.CONFIG_PointCloudSkinner.target_object # remember for later restore
     self.scene.CONFIG_PointCloudSkinner.target_object = obj.name
@@ -118,6 +317,48 @@ class ObjectPointObjectLoader:
 # end of class ObjectPointObjectLoader
 
 
+# This class bakes the point cloud frames of an object into binary frame files with the final
+# points; the object's skip, decimation, modifiers and bounds settings are applied when baking,
+# so loading the baked files needs no parsing or processing. Ranges of frames can be baked
+# by separate (background) blender processes, see scripts/bake_point_cloud.py
+class PointCloudSequenceBaker:
+  def __init__(self, obj, scene=None):
+    self.obj = obj
+    self.scene = scene
+
+    if self.scene == None:
+      self.scene = bpy.context.scene
+
+  # bakes the point cloud frames start to end (inclusive, defaults to all frames);
+  # dest is the path of the baked files, with a %d for the frame number
+  def bake(self, dest, start=0, end=None):
+    loader = ObjectPointObjectLoader(self.obj, scene=self.scene)
+    fileManager = ObjectFileManager(self.obj)
+    dest = fileManager._absolutePath(dest)
+
+    if end == None:
+      end = fileManager.numberOfFiles() - 1
+
+    directory = os.path.dirname(dest)
+    if directory != '' and os.path.isdir(directory) != True:
+      os.makedirs(directory)
+
+    baked = 0
+    for fnumber in range(start, end + 1):
+      if os.path.isfile(fileManager.pathForPointCloudFrame(fnumber)) != True:
+        logger.warning("Couldn't find point cloud frame {0}, skipping".format(fnumber))
+        continue
+
+      file = loader.frameFile(fileManager, fnumber).load()
+      points, indices = loader.framePoints(file, loader.cropBounds(fileManager, fnumber, file))
+      point_cloud_formats.write_frame(dest % fnumber, points, indices, baked=True)
+      baked += 1
+
+    logger.info("Baked {0} point cloud frames to {1}".format(baked, dest))
+    return baked
+# end of class PointCloudSequenceBaker
+
+
 # manages point-cloud data frame files
 class ObjectFileManager:
   def __init__(self, obj):
@@ -143,18 +384,75 @@ class ObjectFileManager:
     fnumber = self.getPointCloudFrameNumber(sceneFrameNumber)
     return self.pathForPointCloudFrame(fnumber)
 
+  # container files hold all point cloud frames in a single file
+  def isContainer(self):
+    return self.config.fileName.endswith(".pcc")
+
+  # gives the number of the frame inside the container file,
+  # or None when every frame has its own file
+  def containerFrameNumber(self, pointCloudFrameNumber):
+    return pointCloudFrameNumber if self.isContainer() else None
+
+  # gives a string that uniquely identifies the data of a point cloud frame
+  def frameIdentifier(self, pointCloudFrameNumber):
+    path = self.pathForPointCloudFrame(pointCloudFrameNumber)
+    if self.isContainer():
+      return "{0}#{1}".format(path, pointCloudFrameNumber)
+    return path
+
   # turns a point cloud frame number into a frame file path
   def pathForPointCloudFrame(self, pointCloudFrameNumber):
     if pointCloudFrameNumber == None:
       return None
 
-    path = self.config.fileName % pointCloudFrameNumber
+    if self.isContainer():
+      path = self.config.fileName
+    else:
+      path = self.config.fileName % pointCloudFrameNumber
+
+    return self._absolutePath(path)
 
+  def _absolutePath(self, path):
     if path.startswith("/"): # absolute path?
       return path
     return bpy.path.abspath("//"+path) # relative path (must be relative to blender file)
 
+  # gives the path of the frame files (with %d for the frame number) or of the container file
+  def sequencePath(self):
+    return self._absolutePath(self.config.fileName)
+
+  # gives the sequence's metadata (read from its sidecar file), or None if it wasn't indexed
+  def metadata(self):
+    if not hasattr(self, 'metadata_cache'):
+      try:
+        self.metadata_cache = point_cloud_formats.read_sidecar(self.sequencePath())
+      except (OSError, ValueError) as err:
+        logger.warning("ObjectFileManager#metadata - could not read metadata sidecar file: {0}".format(err))
+        self.metadata_cache = None
+    return self.metadata_cache
+
+  # reads all frames of the sequence and writes its metadata sidecar file
+  def writeMetadata(self):
+    self.metadata_cache = point_cloud_formats.write_sidecar(self.sequencePath())
+    return self.metadata_cache
+
+  # gives the axis-aligned bounding box of the (unscaled) points of a point cloud frame
+  # as a (min, max) tuple, or None if unknown
+  def frameBounds(self, pointCloudFrameNumber):
+    metadata = self.metadata()
+    if metadata == None or pointCloudFrameNumber == None or pointCloudFrameNumber >= metadata['frames']:
+      return None
+    if metadata['min'][pointCloudFrameNumber] == None: # frame without points
+      return None
+    return metadata['min'][pointCloudFrameNumber], metadata['max'][pointCloudFrameNumber]
+
   def numberOfFiles(self):
+    if self.isContainer():
+      return self.containerNumberOfFrames()
+
+    if self.metadata() != None:
+      return self.metadata()['frames']
+
     if self.config and self.config.numFiles > 0:
       return self.config.numFiles
 
@@ -172,18 +470,54 @@ class ObjectFileManager:
       maxN+=1
 
     self.autoNumberOfFiles_cache = maxN - minN
-    print("ObjectFileManager#autoNumberOfFiles - number of files detected: {0}".format(self.autoNumberOfFiles_cache))
+    logger.debug("ObjectFileManager#autoNumberOfFiles - number of files detected: {0}".format(self.autoNumberOfFiles_cache))
     return self.autoNumberOfFiles_cache
+
+  def container(self):
+    return point_cloud_formats.open_container(self.pathForPointCloudFrame(0))
+
+  # delta containers store most frames as changes from a keyframe
+  def isDeltaContainer(self):
+    try:
+      return self.isContainer() and self.container().is_delta()
+    except (OSError, point_cloud_formats.FormatError):
+      return False
+
+  # reads the number of frames from the container's frame index
+  def containerNumberOfFrames(self):
+    try:
+      return len(self.container())
+    except (OSError, point_cloud_formats.FormatError) as err:
+      logger.warning("ObjectFileManager#containerNumberOfFrames - could not read container file: {0}".format(err))
+      return 0
 # end  of class ObjectFileManager
 
 
 # This class performas the actual mesh operations
-# (creating/removing/updating vertices and faces)
+# (creating/removing/updating vertices and faces);
+# points can be a list of (x,y,z) tuples or an Nx3 (numpy) array
 class PointCloudObjectFrameLoader:
+  _instances = {} # object name -> PointCloudObjectFrameLoader
+
+  # gives the (persistent) loader for the specified object, which remembers
+  # the object's container object across frames; points are set by the caller
+  def instance_for(obj, scene=None):
+    loader = PointCloudObjectFrameLoader._instances.get(obj.name)
+    if loader == None:
+      loader = PointCloudObjectFrameLoader(obj, scene=scene)
+      PointCloudObjectFrameLoader._instances[obj.name] = loader
+      return loader
+
+    # blender can reallocate the object (undo, file loads), so always use the given reference
+    loader.obj = obj
+    loader.scene = scene or bpy.context.scene
+    return loader
+
   def __init__(self, obj, points = [], scene=None):
     self.obj = obj
     self.points = points
     self.scene = scene
+    self.containerName = None # name of the container object that was found or created last
 
     if self.scene == None:
       self.scene = bpy.context.scene
@@ -191,13 +525,13 @@ class PointCloudObjectFrameLoader:
   def _existingMesh(self):
     obj = self._existingContainerObject()
     if obj == None:
-      print("Couldn't find existing container object")
+      logger.debug("Couldn't find existing container object")
       return None
-    print("Found existing pointcloud mesh")
+    logger.debug("Found existing pointcloud mesh")
     return obj.data
 
   def _createMesh(self):
-    print("Creating new pointcloud mesh")
+    logger.debug("Creating new pointcloud mesh")
     return bpy.data.meshes.new("pointscloudmesh")
 
   def getMesh(self):
@@ -206,61 +540,92 @@ class PointCloudObjectFrameLoader:
     return self.getContainerObject().data
 
   def _existingContainerObject(self):
+    # the container object that was used last is (most likely) still there; this is
+    # looked up by name, as references to removed objects can't be used safely
+    if self.containerName != None:
+      cobj = bpy.data.objects.get(self.containerName)
+      if cobj != None and cobj.parent == self.obj and cobj.data != None:
+        return cobj
+      self.containerName = None
+
     # find first child whose name start with "pointcloud" and has mesh data
     for child in self.obj.children:
       if child.name.startswith("pointcloud") and child.data != None:
-        print("Found existing pointcloud container object")
+        logger.debug("Found existing pointcloud container object")
+        self.containerName = child.name
         return child
 
     return None
 
   def _createContainerObject(self): # uncached
-    print("creating pointcloud container object")
+    logger.debug("creating pointcloud container object")
     cobj = bpy.data.objects.new("pointcloud", self._createMesh())
     cobj.parent = self.obj
     # cobj.show_x_ray = True
     self.scene.objects.link(cobj)
+    self.containerName = cobj.name
     return cobj
 
   # ty to get existing object, otherwise create one
   def getContainerObject(self):
     return self._existingContainerObject() or self._createContainerObject()
 
-  # this function does a lot of trickery to get some vertices removed from the pointcloudmesh
-  # it's emabrassing how convoluted blender logic is; it's MVC gone all wrong and reverse
-  def _removeVertices(self, containerObj, count):
-    print("Removing {0} vertices from pointcloud mesh".format(count))
+  # makes sure the container object's mesh has exactly the specified number of vertices (and no edges
+  # or faces), without operators or mode switches. Vertices can't be removed from a mesh outside of edit mode,
+  # so a mesh with too many vertices (or with the edges/faces of a previous frame) is cleared (or replaced
+  # by a new mesh on older blender versions). The coordinates are rewritten anyway. Returns the mesh.
+  def _resizeMesh(self, containerObj, count):
     mesh = containerObj.data
+    existingVertexCount = len(mesh.vertices)
+    hasFaces = len(mesh.edges) > 0 or len(mesh.polygons) > 0
 
-    originalActive = self.scene.objects.active # remember currently active object, so we can restore at the end of this function
-    self.scene.objects.active = containerObj # make specified object the active object
+    if existingVertexCount < count and hasFaces != True:
+      logger.debug("Adding {0} vertices to pointcloud mesh".format(count - existingVertexCount))
+      mesh.vertices.add(count - existingVertexCount)
+      return mesh
 
-    bpy.ops.object.mode_set(mode="EDIT")  # endter edit mode just for a deselect all
-    bpy.ops.mesh.select_all(action = 'DESELECT')
-    # bpy.ops.object.mode_set(mode="OBJECT")  # return to object mode
+    if existingVertexCount == count and hasFaces != True:
+      return mesh
 
-    # select vertices for removal
-    for i in reversed(range(len(mesh.vertices) - count, len(mesh.vertices))):
-      mesh.vertices[i].select = True
+    if hasFaces:
+      logger.debug("Clearing pointcloud mesh")
+    else:
+      logger.debug("Removing {0} vertices from pointcloud mesh".format(existingVertexCount - count))
 
-    # go back into edit mode to delete
-    # bpy.ops.object.mode_set(mode = 'EDIT')
-    bpy.ops.mesh.delete()
-    bpy.ops.object.editmode_toggle() # back to OBJECT mode
-    self.scene.objects.active = originalActive
+    if hasattr(mesh, "clear_geometry"): # blender 2.81+
+      mesh.clear_geometry()
+      mesh.vertices.add(count)
+      return mesh
+
+    newMesh = self._createMesh()
+    newMesh.vertices.add(count)
+    for material in mesh.materials:
+      newMesh.materials.append(material)
+
+    name = mesh.name
+    containerObj.data = newMesh
+    if mesh.users == 0:
+      bpy.data.meshes.remove(mesh)
+      newMesh.name = name
+    return newMesh
 
   def removeExisting(self):
-    print("Removing existing point cloud mesh and container object")
+    logger.debug("Removing existing point cloud mesh and container object")
     containerObject = self._existingContainerObject()
     if containerObject != None:
+      mesh = containerObject.data
+      self.containerName = None
       self.scene.objects.unlink(containerObject)
       bpy.data.objects.remove(containerObject)
+      # don't leave an orphaned mesh datablock behind for every frame
+      if mesh != None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
 
   # the removeFaces function isn't working... can't figure it out
   def removeFaces(self):
     containerObj = self.getContainerObject()
     mesh = self.getMesh()
-    print("Removing all faces from mesh: "+mesh.name)
+    logger.debug("Removing all faces from mesh: "+mesh.name)
 
     originalActive = self.scene.objects.active # remember currently active object, so we can restore at the end of this function
     self.scene.objects.active = containerObj # make specified object the active object
@@ -280,31 +645,133 @@ class PointCloudObjectFrameLoader:
     bm.free()
     self.scene.objects.active = originalActive
 
+  # gives the coordinates of all points as a flat float32 array (x0,y0,z0,x1,y1,z1,...)
+  def flatCoordinates(self):
+    return numpy.ascontiguousarray(self.points, dtype=numpy.float32).reshape(-1)
+
+  # writes the points to the mesh, returns the mesh; the mesh isn't updated,
+  # so the caller can update all changed meshes at once (see updateMesh)
   def createPoints(self):
-    print("Creating point cloud for object: "+self.obj.name)
+    logger.debug("Creating point cloud for object: "+self.obj.name)
+    timings = PointCloudLoadTimings.instance()
+
     # find existing mesh or creates a new one (inside a "pointcloud" container object)
+    # and make sure the mesh has exactly the right amount of vertices
+    with timings.measure('resize'):
+      mesh = self._resizeMesh(self.getContainerObject(), len(self.points))
+
+    # initialize all vertices of the mesh in one call
+    with timings.measure('write'):
+      mesh.vertices.foreach_set("co", self.flatCoordinates())
+
+    return mesh
+
+  # tags a changed mesh for an update (instead of updating the whole scene), which only needs to happen
+  # once after all changes of a frame were made; the edges of meshes with faces are calculated as well
+  def updateMesh(mesh):
+    if mesh != None:
+      mesh.update(calc_edges=len(mesh.polygons) > 0)
+
+  # adds faces to the (point cloud) mesh; triangles is an Nx3 array of vertex indices.
+  # Like createPoints, this leaves the mesh update to the caller
+  def createFaces(self, triangles):
     mesh = self.getMesh()
-    config = self.obj.pointCloudLoaderConfig
+    count = len(triangles)
+    logger.debug("Adding {0} faces to pointcloud mesh".format(count))
+
+    mesh.loops.add(count * 3)
+    mesh.polygons.add(count)
+    mesh.loops.foreach_set("vertex_index", numpy.ascontiguousarray(triangles, dtype=numpy.int32).reshape(-1))
+    mesh.polygons.foreach_set("loop_start", numpy.arange(0, count * 3, 3, dtype=numpy.int32))
+    mesh.polygons.foreach_set("loop_total", numpy.full(count, 3, dtype=numpy.int32))
+# end of class PointCloudObjectFrameLoader
+
+
+# This class updates a point cloud mesh from a delta container, by only writing the
+# vertices that differ from the previously loaded frame. Every vertex of the mesh
+# corresponds with a slot of the container; points that are missing from a frame
+# are at the (transformed) origin. Bounds, decimation and skinning aren't applied.
+class PointCloudDeltaUpdater:
+  _states = {} # object name -> (transform key, loaded frame number, Nx3 float32 array of the mesh's coordinates)
+
+  # seconds per written vertex when setting the changed vertices one by one, and per mesh vertex
+  # when rewriting all of them with foreach_set; moving averages that are measured while updating,
+  # so the cheaper way can be used (see _writeVertices and point_cloud_vertex_write.py)
+  vertexWriteTime = None
+  bulkWriteTime = None
+  # until it was measured, writing vertices one by one is only tried for deltas this small (relative to the mesh)
+  TRY_PER_VERTEX_RATIO = 0.01
+
+  def __init__(self, obj, scene=None):
+    self.obj = obj
+    self.scene = scene
+
+    if self.scene == None:
+      self.scene = bpy.context.scene
 
-    # first make sure the mesh has exactly the right amount of vertices
-    existingVertexCount = len(mesh.vertices.values())
+  # file is a PointCloudFrameFile with the object's load-time settings, used to transform the points;
+  # returns the changed mesh (or None when no vertices changed), which still needs an update
+  def update(self, container, fnumber, file):
+    loader = PointCloudObjectFrameLoader.instance_for(self.obj, scene=self.scene)
+    mesh = loader.getMesh()
+    transformKey = (container.path, file.scale, file.offset, file.multiply)
+    state = PointCloudDeltaUpdater._states.get(self.obj.name)
+    keyframe = container.keyframe(fnumber)
+
+    if state == None or state[0] != transformKey or container.keyframe(state[1]) != keyframe or len(mesh.vertices) != len(state[2]):
+      # nothing to start from; write the complete frame
+      logger.debug("Writing complete delta container frame {0}".format(fnumber))
+      coords, slots = container.frame(fnumber)
+      loader.points = file.transformPoints(coords)
+      mesh = loader.createPoints()
+      # keep the coordinates, so delta updates don't have to read them back from the mesh
+      buffer = numpy.array(loader.points, dtype=numpy.float32).reshape((-1, 3))
+    else:
+      buffer = state[2]
+      previousSlots = container.delta(state[1])[1]
+      coords, slots = container.delta(fnumber)
+      # points that changed in the previous frame, but not in this one, go back to their keyframe position
+      revert = numpy.setdiff1d(previousSlots, slots)
+      keyCoords, unused = container.frame(keyframe)
+      changedSlots = numpy.concatenate((revert, slots)).astype(numpy.int64)
+      buffer[changedSlots] = file.transformPoints(numpy.concatenate((keyCoords[revert], coords)))
+      logger.debug("Updating {0} vertices from delta container frame {1}".format(len(changedSlots), fnumber))
+      mesh = self._writeVertices(mesh, buffer, changedSlots)
+
+    PointCloudDeltaUpdater._states[self.obj.name] = (transformKey, fnumber, buffer)
+    return mesh
+
+  # writes the vertices with the specified slots from buffer (which has the coordinates of all vertices)
+  # to the mesh, either one by one (through the slow per-vertex RNA path) or by rewriting all vertices
+  # with foreach_set, whichever is cheaper for the number of changed vertices; returns the mesh, or None
+  def _writeVertices(self, mesh, buffer, slots):
+    if len(slots) == 0:
+      return None
 
-    if existingVertexCount < len(self.points):
-      print("Adding {0} vertices to pointcloud mesh".format(len(self.points) - existingVertexCount))
-      # add missing vertices
-      mesh.vertices.add(len(self.points) - existingVertexCount)
+    cls = PointCloudDeltaUpdater
+    if cls.vertexWriteTime == None:
+      perVertex = len(slots) <= len(buffer) * cls.TRY_PER_VERTEX_RATIO
+    elif cls.bulkWriteTime == None:
+      perVertex = False
     else:
-      # remove any surplus vertices
-      self._removeVertices(self.getContainerObject(), existingVertexCount - len(self.points))
+      perVertex = len(slots) * cls.vertexWriteTime < len(buffer) * cls.bulkWriteTime
 
-    # initialize all vertices of the mesh
-    idx = 0
-    for point in self.points:
-      mesh.vertices[idx].co = (point[0], point[1], point[2])
-      idx += 1
+    with PointCloudLoadTimings.instance().measure('write'):
+      start = time.perf_counter()
+      if perVertex:
+        vertices = mesh.vertices
+        for slot, co in zip(slots.tolist(), buffer[slots].tolist()):
+          vertices[slot].co = co
+        cls.vertexWriteTime = cls._average(cls.vertexWriteTime, (time.perf_counter() - start) / len(slots))
+      else:
+        mesh.vertices.foreach_set("co", buffer.reshape(-1))
+        cls.bulkWriteTime = cls._average(cls.bulkWriteTime, (time.perf_counter() - start) / len(buffer))
 
-    self.scene.update()
-# end of class PointCloudObjectFrameLoader
+    return mesh
+
+  def _average(average, sample):
+    return sample if average == None else average * 0.8 + sample * 0.2
+# end of class PointCloudDeltaUpdater
 
 # this class applies a specified existing material to a specified existing object
 class PointCloudMeshMaterialiser:
@@ -313,98 +780,89 @@ class PointCloudMeshMaterialiser:
     self.materialName = materialName
 
   def applyMaterial(self):
-    print("Applying material {0} to object {1}".format(self.materialName, self.obj.name))
+    logger.debug("Applying material {0} to object {1}".format(self.materialName, self.obj.name))
 
     materialIdx = bpy.data.materials.find(self.materialName)
 
     if materialIdx == -1:
-      print("Material not found, aborting")
+      logger.warning("Material not found, aborting")
+      return
+
+    # the mesh can be reused for every frame; don't add the material more than once
+    if self.materialName in [material.name for material in self.obj.data.materials if material != None]:
       return
 
     self.obj.data.materials.append(bpy.data.materials[materialIdx])
 
-# A class that represents one file (frame) of point cloud data,
-# this class takes care of parsing the file's data into python data (arrays)
-class PointCloudFrameFile:
-  def __init__(self, path, skip=0, logger=None, minBounds=None, maxBounds=None, offset=None, multiply=None):
-    self.path = path
-    self.logger = logger
-    self.minBounds = minBounds
-    self.maxBounds = maxBounds
-    self.offset = offset
-    self.multiply = multiply
-
-    self.skip = skip # after every read point, skip this number of points
-    self.points = [] # for the points defined in the file
-    self.all_points = [] # for all points; also the non-active ones
-    self.rejected_points = [] # for all points which are reject because of ouf enforced bounds
-
-    if self.logger == None:
-      self.logger = logging # default logging object from the imported logging module
-
-  def get_all_points():
-    if len(self.all_points) == 0:
-      self._loadFrameData()
-    return self.all_points
-
-  def get_points(self):
-    if len(self.points) == 0:
-      self._loadFrameData()
-    return self.points
-
-  def _loadFrameData(self):
-    print("Loading point cloud frame file: " + self.path)
-    f = open(self.path)
-
-    while f:
-      line = f.readline()
-      try:
-        idx,x,y,z = [100*float(v) for v in line.split(",")]
-        reject = False
-        # idx = int(idx)
-
-        v = list((x,y,z)) #Vector(x,y,z) #c4d.Vector(x,y,z) # turn coordinates into c4d Vector object
-
-        if self.multiply != None:
-          for i in range(3):
-            v[i] = v[i] * self.multiply[i]
-
-        if self.offset != None:
-          for i in range(3):
-            v[i] += self.offset[i]
-
-        if self.minBounds != None:
-          for i in range(3):
-            if v[i] < self.minBounds[i]:
-              reject = True
-              break
-
-        if reject != True and self.maxBounds != None:
-          for i in range(3):
-            if v[i] > self.maxBounds[i]:
-              reject = True
-              break
-
-        v = (v[0], v[1], v[2]) # convert from list to immutable tuple
-        self.all_points.append(v) # add the vector to our list
-
-        # create selection of relevant (non-zero) points
-        if reject == True:
-          self.rejected_points.append(v)
-        else:
-          if x*y*z != 0:
-            self.points.append(v)
 
-      except ValueError:
-        break
+# This class loads point cloud frame files on a pool of background threads,
+# so the upcoming frames are already parsed by the time they're needed
+class PointCloudFramePrefetcher:
+  _instance = None
+  WORKERS = 4
+
+  def instance():
+    if PointCloudFramePrefetcher._instance == None:
+      PointCloudFramePrefetcher._instance = PointCloudFramePrefetcher()
+    return PointCloudFramePrefetcher._instance
+
+  def __init__(self, workers=WORKERS):
+    self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    self.futures = {} # file key -> future that gives the loaded PointCloudFrameFile
+    self.objectKeys = {} # object name -> keys of the files that were prefetched for that object
+    self.sceneFrames = {} # object name -> last scene frame
+
+  # gives the playback direction (1 or -1) for the specified object,
+  # based on the previous scene frame that was loaded for it
+  def direction(self, objName, sceneFrame):
+    previous = self.sceneFrames.get(objName)
+    self.sceneFrames[objName] = sceneFrame
+    return -1 if previous != None and sceneFrame < previous else 1
+
+  # starts loading the specified files in the background; earlier prefetches that no object
+  # needs anymore are cancelled. Files that finished loading go to the frame cache, which
+  # keeps them within its budget (and where prepareFrame looks first)
+  def prefetch(self, objName, files):
+    keys = set()
+    for file in files:
+      key = file.key()
+      keys.add(key)
+      if key not in self.futures:
+        self.futures[key] = self.executor.submit(file.load)
+
+    self.objectKeys[objName] = keys
+    # objects that load the same files share their futures
+    wanted = set().union(*self.objectKeys.values())
+
+    for key, future in list(self.futures.items()):
+      # (only cancels futures that didn't start yet, the others finish and are cached)
+      if key not in wanted:
+        future.cancel()
+
+      if future.done():
+        del self.futures[key]
+        if not future.cancelled() and future.exception() == None:
+          PointCloudFrameCache.instance().put(future.result())
+
+  # gives the loaded (prefetched) version of the specified file,
+  # or None if it wasn't prefetched. Waits if it's still loading.
+  def take(self, file):
+    future = self.futures.pop(file.key(), None)
+    if future == None or future.cancelled():
+      return None
 
-      # skip some points (if skip > 0)
-      for i in range(self.skip):
-        f.readline()
+    try:
+      return future.result()
+    except Exception as err:
+      logger.warning("PointCloudFramePrefetcher#take - prefetch failed: {0}".format(err))
+      return None
 
-    f.close()
-    print('PointCloudFrameFile#_loadFrameData - points read (total/active): {0}/{1}'.format(str(len(self.all_points)), str(len(self.points))))
-# end of class PointCloudFrameFile
+  def shutdown(self):
+    for future in self.futures.values():
+      future.cancel()
+    self.futures = {}
+    self.executor.shutdown(wait=False)
+# end of class PointCloudFramePrefetcher
 
 
 # This class is in charge of the blender UI panel
@@ -428,21 +886,60 @@ class PointCloudLoaderPanel(bpy.types.Panel):
         if config.enabled == True:
           layout.row().prop(config, "fileName")
           layout.row().prop(config, "skipPoints")
-          layout.row().prop(config, "numFiles")
-
-          if config.numFiles == 0:
-            layout.row().label(text="Number of files will be auto-detected at runtime")
-
+          layout.row().prop(config, "decimation")
+          if config.decimation == 'VOXEL':
+            layout.row().prop(config, "voxelSize")
+          elif config.decimation == 'RANDOM':
+            layout.row().prop(config, "decimationRatio")
+          elif config.decimation == 'TARGET':
+            layout.row().prop(config, "targetPoints")
+
+          fileManager = ObjectFileManager(context.object)
+          metadata = fileManager.metadata()
+
+          if fileManager.isContainer():
+            layout.row().label(text="Number of frames in container: {0}".format(fileManager.numberOfFiles()))
+          elif metadata != None:
+            layout.row().label(text="Number of frames (from metadata): {0}".format(metadata['frames']))
+          else:
+            layout.row().prop(config, "numFiles")
+
+            if config.numFiles == 0:
+              layout.row().label(text="Number of files will be auto-detected at runtime")
+
+          if metadata != None and metadata['global_min'] != None:
+            # show the bounds of the data the way it's loaded, to help configuring the load-time bounds
+            file = ObjectPointObjectLoader(context.object).frameFile(fileManager, 0)
+            lo, hi = file.transformBounds(metadata['global_min'], metadata['global_max'])
+            layout.row().label(text="Data bounds: ({0:.2f}, {1:.2f}, {2:.2f}) - ({3:.2f}, {4:.2f}, {5:.2f})".format(*(list(lo) + list(hi))))
+            layout.row().label(text="Points per frame: {0} - {1}".format(min(metadata['counts']), max(metadata['counts'])))
+
+          layout.row().operator("object.index_point_cloud_sequence", text="Index sequence (create metadata)" if metadata == None else "Re-index sequence")
           layout.row().operator("object.set_pointcloud_animation_length", text="Set animation length")
           layout.row().prop(config, "frameRatio")
           layout.row().prop(config, "pointCloudFrame")
 
+          layout.row().prop(config, "lodPlayback")
+
+          if fileManager.isDeltaContainer():
+            layout.row().prop(config, "deltaUpdates", text="Only update changed vertices (ignores bounds, decimation and skin)")
+
+          layout.row().prop(config, "prefetch", text="Prefetch upcoming frames")
+          if config.prefetch == True:
+            layout.row().prop(config, "prefetchFrames")
+
           layout.row().prop(config, "skin")
           layout.row().prop(config, "materialName")
 
           if config.skin == True:
-            if ObjectPointObjectLoader(context.object).canSkin() != True:
-              layout.row().label(text="!! Please install/enable Point Cloud Skinner addon !!")
+            layout.row().prop(config, "skinMethod")
+            if config.skinMethod == 'GRID':
+              layout.row().prop(config, "gridWidth")
+              layout.row().prop(config, "maxEdgeLength")
+            else:
+              layout.row().prop(config, "reuseContainer")
+              if ObjectPointObjectLoader(context.object).canSkin() != True:
+                layout.row().label(text="!! Please install/enable Point Cloud Skinner addon !!")
 
           layout.row().prop(config, 'modify', text="Vertex load-time modifiers")
 
@@ -459,6 +956,22 @@ class PointCloudLoaderPanel(bpy.types.Panel):
           layout.row().operator("object.load_point_cloud", text="Load point cloud now")
 
         layout.row().operator("object.remove_point_cloud", text="Remove point cloud")
+
+        # the frame cache is shared by all objects
+        cache = PointCloudFrameCache.instance()
+        layout.row().prop(context.scene.pointCloudLoaderSceneConfig, "cacheSize")
+        layout.row().label(text="Frame cache: {0} frames, {1:.1f} MB, {2} hits, {3} misses".format(len(cache.files), cache.size / (1024.0 * 1024.0), cache.hits, cache.misses))
+        layout.row().operator("object.clear_point_cloud_cache", text="Clear frame cache")
+
+        sceneConfig = context.scene.pointCloudLoaderSceneConfig
+        layout.row().prop(sceneConfig, "logLevel")
+        layout.row().prop(sceneConfig, "showTimings")
+        if sceneConfig.showTimings == True:
+          for stage, count, average, p95 in PointCloudLoadTimings.instance().stats():
+            layout.row().label(text="{0}: {1:.1f} ms average, {2:.1f} ms p95 ({3})".format(stage, average * 1000.0, p95 * 1000.0, count))
+          row = layout.row()
+          row.operator("object.export_point_cloud_timings", text="Export CSV")
+          row.operator("object.clear_point_cloud_timings", text="Clear timings")
 # end of class PointCloudLoaderPanel
 
 
@@ -473,13 +986,37 @@ class PointCloudLoaderConfig(bpy.types.PropertyGroup):
 
     # Add in the properties
     cls.enabled = bpy.props.BoolProperty(name="enabled", default=False, description="Enable point cloud for this object")
-    cls.fileName = bpy.props.StringProperty(name="Data Files", default="pointCloudData/frame%d.txt")
+    cls.fileName = bpy.props.StringProperty(name="Data Files", default="pointCloudData/frame%d.txt", description="Path of the point cloud frame files; text (.txt) or binary (.pcf) files, or a single container (.pcc) file")
     cls.skipPoints = bpy.props.IntProperty(name="Skip Points", default=0, soft_min=0)
+    cls.decimation = bpy.props.EnumProperty(name="Decimation", default='NONE', description="Load-time reduction of the number of points", items=[
+      ('NONE', "None", "Load all points"),
+      ('VOXEL', "Voxel grid", "Keep one point per grid cell, for an even spatial coverage"),
+      ('RANDOM', "Random", "Keep a random selection of the points"),
+      ('TARGET', "Target point count", "Keep (at most) a fixed number of random points")])
+    cls.voxelSize = bpy.props.FloatProperty(name="Voxel size", default=1.0, min=0.0001, description="Size of the grid cells for voxel grid decimation")
+    cls.decimationRatio = bpy.props.FloatProperty(name="Ratio", default=0.1, min=0.0, max=1.0, description="Part of the points to keep for random decimation")
+    cls.targetPoints = bpy.props.IntProperty(name="Target points", default=100000, min=0, description="Maximum number of points to keep for target point count decimation")
     cls.numFiles = bpy.props.IntProperty(name="Number of files", default=100, soft_min=0)
     cls.frameRatio = bpy.props.FloatProperty(name="Frame ratio", default=1.0, soft_min=0.0, description="Point cloud frame / blender frame ratio")
     cls.pointCloudFrame = bpy.props.IntProperty(name="Current Point Cloud Data Frame", default=-1, soft_min=-1, description="Key-frameable property to specify which ppoint cloud data frame to use. When -1, it will be ignored, and the frameRatio will be used to calculate the current point cloud data from from the current scene frame.")
 
-    cls.skin = bpy.props.BoolProperty(name="skin", default=False, description="Skin point cloud mesh using, Point Cloud Skinner addon")
+    cls.lodPlayback = bpy.props.EnumProperty(name="Playback detail", default='FULL', description="Level of detail for (viewport) playback; renders always use all points", items=[
+      ('FULL', "Full", "Use all points"),
+      ('QUARTER', "1/4", "Use a quarter of the points"),
+      ('SIXTEENTH', "1/16", "Use 1/16th of the points")])
+
+    cls.deltaUpdates = bpy.props.BoolProperty(name="deltaUpdates", default=False, description="For delta containers; only update the vertices that changed since the previous frame")
+
+    cls.prefetch = bpy.props.BoolProperty(name="prefetch", default=False, description="Load and parse the upcoming point cloud frames in the background during playback")
+    cls.prefetchFrames = bpy.props.IntProperty(name="Prefetch frames", default=4, min=1, soft_max=32, description="Number of upcoming point cloud frames to prefetch")
+
+    cls.skin = bpy.props.BoolProperty(name="skin", default=False, description="Create faces for the point cloud mesh")
+    cls.skinMethod = bpy.props.EnumProperty(name="Skin method", default='SKINNER', description="How to create the faces of the point cloud mesh", items=[
+      ('SKINNER', "Point Cloud Skinner", "Use the Point Cloud Skinner addon"),
+      ('GRID', "Depth image grid", "Connect the points that are neighbours in the depth image they were recorded from (needs the idx values of the points)")])
+    cls.reuseContainer = bpy.props.BoolProperty(name="Reuse container object", default=False, description="Keep the pointcloud container object and replace its geometry every frame, instead of creating a new object and mesh for every frame")
+    cls.gridWidth = bpy.props.IntProperty(name="Depth image width", default=640, min=2, description="Width (in pixels) of the depth image the points were recorded from")
+    cls.maxEdgeLength = bpy.props.FloatProperty(name="Max edge length", default=10.0, min=0.0, description="Leave out faces with a longer edge (depth discontinuities); 0 keeps all faces")
     cls.materialName = bpy.props.StringProperty(name="Material name", default="")
 
     cls.modify = bpy.props.BoolProperty(name="modify", default=False, description="Modify point cloud vertices at load time")
@@ -507,6 +1044,33 @@ class PointCloudLoaderConfig(bpy.types.PropertyGroup):
 # end of class PointCloudLoaderConfig
 
 
+def updateLogLevel(self, context):
+  for moduleLogger in LOGGERS:
+    moduleLogger.setLevel(getattr(logging, self.logLevel))
+
+# applies the (saved) Log level setting of a scene; the setting's update callback only runs when it's changed
+def applyLogLevel(scene):
+  if scene != None and hasattr(scene, 'pointCloudLoaderSceneConfig'):
+    updateLogLevel(scene.pointCloudLoaderSceneConfig, None)
+
+# This class represents the scene-wide config data
+class PointCloudLoaderSceneConfig(bpy.types.PropertyGroup):
+  @classmethod
+  def register(cls):
+    bpy.types.Scene.pointCloudLoaderSceneConfig = bpy.props.PointerProperty(
+      name="Point Cloud Loader Scene Config",
+      description="Scene-wide Point Cloud Loader properties",
+      type=cls)
+
+    cls.cacheSize = bpy.props.IntProperty(name="Frame cache size (MB)", default=512, min=0, description="Memory budget for the cache of parsed point cloud frames, shared by all objects. 0 disables the cache.")
+    cls.showTimings = bpy.props.BoolProperty(name="Show timings", default=False, description="Show the average and 95th percentile durations of the stages of loading point cloud frames")
+    cls.logLevel = bpy.props.EnumProperty(name="Log level", default='WARNING', description="Minimum level of the messages of the Point Cloud Loader in the console", update=updateLogLevel, items=[
+      ('DEBUG', "Debug", "Log all messages, including the ones for every frame"),
+      ('INFO', "Info", "Log informational messages, warnings and errors"),
+      ('WARNING', "Warning", "Only log warnings and errors")])
+# end of class PointCloudLoaderSceneConfig
+
+
 # Operation classes
 class PointCloudLoaderLoadOperator(bpy.types.Operator):
     bl_idname = "object.load_point_cloud"
@@ -538,6 +1102,36 @@ class PointCloudLoaderRemoveOperator(bpy.types.Operator):
         ObjectPointObjectLoader(obj, force=True).removeExisting()
       return {'FINISHED'}
 
+class PointCloudLoaderClearCacheOperator(bpy.types.Operator):
+    bl_idname = "object.clear_point_cloud_cache"
+    bl_label = "Clear point cloud frame cache (Point Cloud Loader)"
+    bl_description = "Remove all parsed point cloud frames from memory"
+
+    def execute(self, context):
+      PointCloudFrameCache.instance().clear()
+      return {'FINISHED'}
+
+class PointCloudLoaderExportTimingsOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_point_cloud_timings"
+    bl_label = "Export point cloud timings (Point Cloud Loader)"
+    bl_description = "Write the durations of the stages of loading point cloud frames to a CSV file"
+
+    filename_ext = ".csv"
+    filter_glob = bpy.props.StringProperty(default="*.csv", options={'HIDDEN'})
+
+    def execute(self, context):
+      PointCloudLoadTimings.instance().writeCsv(self.filepath)
+      return {'FINISHED'}
+
+class PointCloudLoaderClearTimingsOperator(bpy.types.Operator):
+    bl_idname = "object.clear_point_cloud_timings"
+    bl_label = "Clear point cloud timings (Point Cloud Loader)"
+    bl_description = "Forget the measured durations of the stages of loading point cloud frames"
+
+    def execute(self, context):
+      PointCloudLoadTimings.instance().clear()
+      return {'FINISHED'}
+
 class PointCloudLoaderReloadOperator(bpy.types.Operator):
     bl_idname = "object.reload_point_cloud"
     bl_label = "Remove point cloud (Point Cloud Loader)"
@@ -552,6 +1146,16 @@ class PointCloudLoaderReloadOperator(bpy.types.Operator):
       bpy.ops.object.load_point_cloud()
       return {'FINISHED'}
 
+class PointCloudLoaderIndexSequenceOperator(bpy.types.Operator):
+    bl_idname = "object.index_point_cloud_sequence"
+    bl_label = "Index point cloud sequence (Point Cloud Loader)"
+    bl_description = "Read all point cloud frames once and write a metadata file with the number of frames, points and bounds"
+
+    def execute(self, context):
+      metadata = ObjectFileManager(context.object).writeMetadata()
+      self.report({'INFO'}, "Indexed {0} point cloud frames".format(metadata['frames']))
+      return {'FINISHED'}
+
 class PointCloudLoaderSetPointcloudAnimationLengthOperator(bpy.types.Operator):
     bl_idname = "object.set_pointcloud_animation_length"
     bl_label = "Set animation length based on point cloud data length (Point Cloud Loader)"
@@ -568,19 +1172,74 @@ class PointCloudLoaderSetPointcloudAnimationLengthOperator(bpy.types.Operator):
 
 
 # Blender addon stuff, (un-)registerers and events handlers
+
+# set by the render handlers, renders always use the full level of detail
+_rendering = False
+
+def isRendering():
+  return _rendering or bpy.app.background
+
 @persistent
 def frameHandler(scene):
-  print("-- PointCloudLoader frame update START --")
+  logger.debug("-- PointCloudLoader frame update START --")
   PointCloudLoader(scene=scene).loadFrame()
-  print("-- PointCloudLoader frame update END --")
+  logger.debug("-- PointCloudLoader frame update END --")
+
+@persistent
+def loadHandler(*args):
+  applyLogLevel(bpy.context.scene)
+
+@persistent
+def renderStartHandler(scene):
+  global _rendering
+  _rendering = True
+  # the current frame might have been loaded at a coarse level of detail for playback
+  PointCloudLoader(scene=scene).loadFrame()
+
+@persistent
+def renderEndHandler(scene):
+  global _rendering
+  _rendering = False
+
+# render_init (blender 2.76+) runs before the first frame of an animation render is set
+RENDER_START_HANDLERS = ('render_init', 'render_pre')
+RENDER_END_HANDLERS = ('render_complete', 'render_cancel')
 
 def register():
   bpy.utils.register_module(__name__)
   bpy.app.handlers.frame_change_pre.append(frameHandler)
+  bpy.app.handlers.load_post.append(loadHandler)
+  # the context is restricted while addons are registered at startup
+  applyLogLevel(getattr(bpy.context, 'scene', None))
+
+  for name in RENDER_START_HANDLERS:
+    if hasattr(bpy.app.handlers, name):
+      getattr(bpy.app.handlers, name).append(renderStartHandler)
+  for name in RENDER_END_HANDLERS:
+    if hasattr(bpy.app.handlers, name):
+      getattr(bpy.app.handlers, name).append(renderEndHandler)
 
 def unregister():
   bpy.utils.unregister_module(__name__)
   bpy.app.handlers.frame_change_pre.remove(frameHandler)
+  bpy.app.handlers.load_post.remove(loadHandler)
+
+  for name in RENDER_START_HANDLERS:
+    if hasattr(bpy.app.handlers, name):
+      getattr(bpy.app.handlers, name).remove(renderStartHandler)
+  for name in RENDER_END_HANDLERS:
+    if hasattr(bpy.app.handlers, name):
+      getattr(bpy.app.handlers, name).remove(renderEndHandler)
+
+  if PointCloudLoader._executor != None:
+    PointCloudLoader._executor.shutdown(wait=False)
+    PointCloudLoader._executor = None
+
+  if PointCloudFramePrefetcher._instance != None:
+    PointCloudFramePrefetcher._instance.shutdown()
+    PointCloudFramePrefetcher._instance = None
+
+  PointCloudObjectFrameLoader._instances = {}
 
 if __name__ == "__main__":
   register()
@@ -1,6 +1,8 @@
 
 # import json
 import logging #,socket
+import struct
+import time
 
 try:
     # import OSC
@@ -11,12 +13,61 @@ except ImportError as e:
     # logging.getLogger().warning(e)
     logging.getLogger().warning("Could not import pythonosc library for OscSender")
 
+# builds the OscMessage for an address and its arguments
+def build_message(addr, params = []):
+    msg = OscMessageBuilder(address = addr)
+    for param in params:
+        msg.add_arg(param)
+    return msg.build()
+
+# the OSC type tags and struct formats of the argument types the fast send path packs
+TEMPLATE_ARG_TYPES = {float: 'f', int: 'i'}
+
+# encodes an OSC string; like pythonosc, with 1-4 null bytes of padding
+def encode_string(value):
+    data = value.encode('utf-8')
+    return data + b'\x00' * (4 - len(data) % 4)
+
+# gives the struct that packs a message to an address with arguments of the given types
+# (with the encoded address and type tags as its first, prebuilt, field), or None when
+# the fast send path doesn't support one of the types
+def message_template(addr, arg_types):
+    if not addr or not isinstance(addr, str):
+        return None
+    tags = ''
+    for arg_type in arg_types:
+        if arg_type not in TEMPLATE_ARG_TYPES:
+            return None
+        tags += TEMPLATE_ARG_TYPES[arg_type]
+    prefix = encode_string(addr) + encode_string(',' + tags)
+    return (prefix, struct.Struct('>{0}s{1}'.format(len(prefix), tags)))
+
+# a prebuilt datagram, that can be sent with UDPClient.send like an OscMessage or OscBundle
+class Datagram:
+    def __init__(self, dgram):
+        self.dgram = dgram
+        self.size = len(dgram)
+
 class OscSender:
+    # seconds between the NTP epoch (1900) and the system time epoch (1970)
+    NTP_DELTA = 2208988800
+    # bytes of IP and UDP headers; the mtu option minus these gives the maximum datagram size
+    UDP_IP_HEADER_SIZE = 28
     def __init__(self, options = {}):
         # attributes
         self.client = None
         self.running = False
         self.connected = False
+        self.bundle_timestamp = None
+        self.bundle_messages = None # the messages to bundle, while bundling (see begin_bundle)
+        # (prefix, struct) per (address, argument types), see message_template
+        self.templates = {}
+        # reused for the datagrams of the fast send path
+        self.datagram = Datagram(b'')
+
+        # counters of the sent datagrams (see reset_counters)
+        self.packets = 0
+        self.bytes = 0
 
         # events
         #self.connectEvent = Event()
@@ -56,6 +107,51 @@ class OscSender:
         # default is localhost
         return self.options['host'] if 'host' in self.options else '127.0.0.1'
 
+    def mtu(self):
+        # default is 1500 (ethernet)
+        return int(self.options['mtu']) if 'mtu' in self.options else 1500
+
+    def reset_counters(self):
+        self.packets = 0
+        self.bytes = 0
+
+    # collects the messages of the following send calls, until end_bundle sends them in
+    # bundles with the specified timestamp (seconds since the epoch, defaults to now)
+    def begin_bundle(self, timestamp=None):
+        self.bundle_timestamp = time.time() if timestamp is None else timestamp
+        self.bundle_messages = []
+
+    # sends the collected messages in as few bundles as possible; every bundle fits in a single
+    # datagram of the mtu option (a single message that doesn't fit gets a bundle of its own)
+    def end_bundle(self):
+        messages = self.bundle_messages
+        self.bundle_messages = None
+        if not messages:
+            return
+
+        max_size = self.mtu() - OscSender.UDP_IP_HEADER_SIZE
+        header = b'#bundle\x00' + self._timetag(self.bundle_timestamp)
+        elements = []
+        size = len(header)
+
+        for msg in messages:
+            # every bundle element is preceded by its size
+            if len(elements) > 0 and size + 4 + msg.size > max_size:
+                self._send(Datagram(header + b''.join(elements)), 'bundle')
+                elements = []
+                size = len(header)
+
+            elements.append(struct.pack('>i', msg.size) + msg.dgram)
+            size += 4 + msg.size
+
+        self._send(Datagram(header + b''.join(elements)), 'bundle')
+
+    # encodes a system time as an OSC (NTP) timetag; this is done here because pythonosc's
+    # OscBundleBuilder doesn't encode the fraction of a second correctly
+    def _timetag(self, timestamp):
+        seconds, fraction = divmod(timestamp + OscSender.NTP_DELTA, 1)
+        return struct.pack('>II', int(seconds), int(fraction * (1 << 32)))
+
     def _connect(self):
         try:
             # self.client = OSC.OSCClient()
@@ -95,16 +191,48 @@ class OscSender:
         # for param in params:
         #     msg.append(param)
 
-        msg = OscMessageBuilder(address = addr)
-        for param in params:
-            msg.add_arg(param)
-        msg = msg.build()
+        dgram = self._pack(addr, params)
+        if dgram is None:
+            msg = build_message(addr, params)
+        elif self.bundle_messages is not None:
+            msg = Datagram(dgram)
+        else:
+            msg = self.datagram
+            msg.dgram = dgram
+            msg.size = len(dgram)
+
+        if self.bundle_messages is not None:
+            self.bundle_messages.append(msg)
+            return
+
+        self._send(msg, addr)
+
+    # the fast send path; packs the message with the cached template for its address and argument
+    # types, without OscMessageBuilder (and the OscMessage that parses the datagram again).
+    # Gives None for the messages the template can't pack (those go through OscMessageBuilder)
+    def _pack(self, addr, params):
+        key = (addr, tuple(map(type, params)))
+        try:
+            template = self.templates[key]
+        except KeyError:
+            template = self.templates[key] = message_template(*key)
+
+        if template is None:
+            return None
+        try:
+            return template[1].pack(template[0], *params)
+        except struct.error:
+            # out of range ints; OscMessageBuilder raises the error
+            return None
 
+    def _send(self, content, description):
         try:
-            self.client.send(msg)
-            logging.getLogger().debug("OscSender.send " + addr)
+            self.client.send(content)
+            self.packets += 1
+            self.bytes += content.size
+            logging.getLogger().debug("OscSender.send " + description)
         except Exception as err: # OSC.OSCClientError as err:
-            logging.getLogger().error("OscSender.send " + addr + " FAILED: " + err)
+            logging.getLogger().error("OscSender.send " + description + " FAILED: {0}".format(err))
             pass
             # ColorTerminal().warn("OSC failure: {0}".format(err))
             # no need to call connect again on the client, it will automatically
@@ -0,0 +1,185 @@
+"""OSC timeline files, baked by the bl2030 addon, and a player for them.
+
+A timeline file (.osct) contains OSC messages (as complete datagrams) with
+the time they should be sent at. All values are little endian:
+
+    header (32 bytes)
+        4s   magic    b'OSCT'
+        H    version  1
+        H    reserved always 0
+        d    fps      frames per second of the scene the timeline was baked from
+        d    duration length of the timeline in seconds (the complete frame range)
+        I    count    number of events
+        I    reserved always 0
+    events, sorted by time
+        d    time     seconds since the start of the timeline
+        I    size     size of the datagram in bytes
+        size bytes    OSC datagram
+
+The player only needs the python standard library, so timelines can be
+played back on machines without blender (or pythonosc):
+
+    python osc_timeline.py play show.osct --host 192.168.1.20 --port 8000
+    python osc_timeline.py info show.osct
+"""
+
+import argparse
+import logging
+import socket
+import struct
+import time
+
+TIMELINE_MAGIC = b'OSCT'
+TIMELINE_VERSION = 1
+TIMELINE_HEADER = struct.Struct('<4sHHddII')
+EVENT_HEADER = struct.Struct('<dI')
+
+# the player sleeps until this many seconds before an event, and waits actively for the rest
+SPIN_TIME = 0.002
+
+
+class FormatError(Exception):
+    """Error raised when a file is not a valid timeline file."""
+
+
+def write_timeline(path, fps, events, duration=None):
+    """Writes a timeline file; events is a sequence of (time, datagram) tuples.
+    The duration defaults to the time of the last event."""
+    events = sorted(events, key=lambda event: event[0])
+    if duration is None:
+        duration = events[-1][0] if len(events) > 0 else 0.0
+    with open(path, 'wb') as f:
+        f.write(TIMELINE_HEADER.pack(TIMELINE_MAGIC, TIMELINE_VERSION, 0, fps, duration, len(events), 0))
+        for event_time, dgram in events:
+            f.write(EVENT_HEADER.pack(event_time, len(dgram)))
+            f.write(dgram)
+
+
+def read_timeline(path):
+    """Reads a timeline file, returns (fps, duration, events), where
+    events is a list of (time, datagram) tuples, sorted by time."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < TIMELINE_HEADER.size:
+        raise FormatError('Incomplete timeline header')
+    magic, version, _, fps, duration, count, _ = TIMELINE_HEADER.unpack_from(data, 0)
+    if magic != TIMELINE_MAGIC:
+        raise FormatError('Not an OSC timeline file')
+    if version > TIMELINE_VERSION:
+        raise FormatError('Unsupported OSC timeline version: {0}'.format(version))
+
+    events = []
+    offset = TIMELINE_HEADER.size
+    for _ in range(count):
+        if offset + EVENT_HEADER.size > len(data):
+            raise FormatError('Incomplete timeline event')
+        event_time, size = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        events.append((event_time, data[offset:offset + size]))
+        offset += size
+    return fps, duration, events
+
+
+def _address(dgram):
+    # the OSC address of a message datagram
+    return dgram[:dgram.index(b'\x00')]
+
+
+def _has_arguments(dgram):
+    # the type tag string starts after the (null-padded) address
+    offset = len(_address(dgram)) // 4 * 4 + 4
+    return dgram[offset + 1:offset + 2] not in (b'', b'\x00')
+
+
+def state_at(events, start):
+    """Gives the datagrams of the latest message to every address before start, which
+    bring a receiver in the state of the timeline at that time. Messages without
+    arguments (like the ones of timeline markers) are cues, not state, so they're left out."""
+    latest = {}
+    for event_time, dgram in events:
+        if event_time >= start:
+            break
+        if _has_arguments(dgram):
+            latest[_address(dgram)] = dgram
+    return list(latest.values())
+
+
+def wait_until(target, clock=time.perf_counter):
+    """Waits until clock() reaches target; sleeps for most of the time and
+    waits actively for the last SPIN_TIME seconds, as sleep isn't accurate."""
+    remaining = target - clock()
+    if remaining > SPIN_TIME:
+        time.sleep(remaining - SPIN_TIME)
+    while clock() < target:
+        pass
+
+
+def play(path, host, port, speed=1.0, start=0.0, loop=False):
+    """Sends the events of a timeline file to host:port (over UDP) at their time.
+
+    speed scales the playback speed, start is the time (in seconds) in the
+    timeline to start at; the state at that time is sent first (see state_at).
+    With loop, the timeline is repeated (after its duration) until interrupted.
+    """
+    fps, duration, events = read_timeline(path)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    address = (host, port)
+    logging.getLogger(__name__).info('Playing {0} events to {1}:{2}'.format(len(events), host, port))
+
+    try:
+        for dgram in state_at(events, start):
+            sock.sendto(dgram, address)
+
+        # the (clock) time of the start of the timeline; loops are timed from the
+        # start of the first one, so they don't drift
+        begin = time.perf_counter() - start / speed
+        while True:
+            for event_time, dgram in events:
+                if event_time < start:
+                    continue
+                wait_until(begin + event_time / speed)
+                sock.sendto(dgram, address)
+
+            if not loop or duration <= 0:
+                return
+            begin += duration / speed
+            start = 0.0
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+
+    play_command = commands.add_parser('play', help='send the events of a timeline file')
+    play_command.add_argument('path')
+    play_command.add_argument('--host', default='127.0.0.1')
+    play_command.add_argument('--port', type=int, default=8080)
+    play_command.add_argument('--speed', type=float, default=1.0, help='playback speed (default: 1.0)')
+    play_command.add_argument('--start', type=float, default=0.0, help='time (in seconds) to start at')
+    play_command.add_argument('--loop', action='store_true', help='repeat the timeline until interrupted')
+
+    info_command = commands.add_parser('info', help='show the length and number of events of a timeline file')
+    info_command.add_argument('path')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'play':
+        try:
+            play(args.path, args.host, args.port, speed=args.speed, start=args.start, loop=args.loop)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'info':
+        fps, duration, events = read_timeline(args.path)
+        print('{0} events, {1:.2f} seconds ({2} fps)'.format(len(events), duration, fps))
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,647 @@
+"""Point cloud frame file formats used by the Point Cloud Loader addon.
+
+Text frame files (.txt) contain one point per line, formatted as idx,x,y,z.
+
+Binary frame files (.pcf) contain the same data, packed for memory-mapping.
+All values are little endian:
+
+    header (16 bytes)
+        4s   magic    b'PCF\\x00'
+        H    version  1
+        H    flags    bit 0 (FLAG_INDEX): the body contains an idx column
+                      bit 1 (FLAG_LOD): the points are in level-of-detail order
+                      bit 3 (FLAG_BAKED): the coordinates are final; the load-time
+                      settings of the addon were applied when the file was baked
+        I    count    number of points in the frame
+        I    reserved always 0
+    body
+        count * 3 float32   x,y,z coordinates of all points
+        count * uint32      idx of all points (only if FLAG_INDEX is set)
+
+Container files (.pcc) hold all frames of a sequence in a single file,
+preceded by an index of the frames:
+
+    header (16 bytes)
+        4s   magic    b'PCC\\x00'
+        H    version  1 (2 for delta containers)
+        H    flags    bit 0 (FLAG_INDEX): all frames contain an idx column
+                      bit 1 (FLAG_LOD): all frames are in level-of-detail order
+                      bit 2 (FLAG_DELTA): a delta container, see below
+        I    frames   number of frames in the container
+        I    reserved always 0
+    frame index (16 bytes per frame)
+        Q    offset   absolute file offset of the frame's data
+        I    count    number of points in the frame
+        I    keyframe number of the frame's keyframe (delta containers), otherwise 0
+    frame data (at the offset of each frame)
+        count * 3 float32   x,y,z coordinates of all points
+        count * uint32      idx of all points (only if FLAG_INDEX is set)
+
+In a delta container, every point has a fixed slot: the slots are all idx
+values that occur in the sequence, in ascending order, and a point that's
+missing from a frame is stored as (0,0,0). Keyframes (frames whose keyframe
+is the frame itself) store the points of all slots, with the idx column.
+All other frames only store the points that differ from their keyframe;
+their idx column holds the slot numbers of those points instead of idx values.
+
+The coordinates are stored exactly as they appear in the text files; any
+load-time scaling and modifiers are applied by the reader.
+
+Points in level-of-detail order are randomly shuffled, so that the first
+1/n-th of the points of a frame is an evenly spread selection of its points,
+for any n. A reader can load a coarse level of detail by only using the
+first part of the points.
+
+A sequence (a frame file pattern with %d for the frame number, or a
+container file) can have a metadata sidecar file: a JSON file next to the
+sequence, named after the sequence with the %d removed and .meta.json
+appended (for example frame.txt.meta.json for frame%d.txt). It contains
+the number of frames, the number of points and axis-aligned bounding box
+(of the unscaled coordinates) of every frame, and the global bounding box.
+
+Run this module as a script to convert a directory of text frame files,
+to pack a sequence of frame files into a container or to create the
+metadata sidecar of a sequence:
+
+    python point_cloud_formats.py convert pointCloudData/
+    python point_cloud_formats.py pack pointCloudData/frame%d.txt capture.pcc
+    python point_cloud_formats.py index pointCloudData/frame%d.txt
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import struct
+
+import numpy
+
+PCF_MAGIC = b'PCF\x00'
+PCF_VERSION = 1
+PCF_HEADER = struct.Struct('<4sHHII')
+
+PCC_MAGIC = b'PCC\x00'
+PCC_VERSION = 2
+PCC_HEADER = struct.Struct('<4sHHII')
+PCC_INDEX_DTYPE = numpy.dtype([('offset', '<u8'), ('count', '<u4'), ('keyframe', '<u4')])
+
+FLAG_INDEX = 1
+FLAG_LOD = 2
+FLAG_DELTA = 4
+FLAG_BAKED = 8
+
+COORDS_DTYPE = numpy.dtype('<f4')
+INDEX_DTYPE = numpy.dtype('<u4')
+
+
+class FormatError(Exception):
+    """Error raised when a file is not in the expected format."""
+
+
+def _fields_per_line(text, count):
+    # returns True if every line of text has count comma-separated fields
+    if len(text) == 0:
+        return True
+    chars = numpy.frombuffer(text.encode('utf-8'), dtype=numpy.uint8)
+    commas = numpy.flatnonzero(chars == ord(','))
+    newlines = numpy.flatnonzero(chars == ord('\n'))
+    # the number of commas before every line end
+    ends = numpy.concatenate(([0], numpy.searchsorted(commas, newlines), [len(commas)]))
+    return bool((numpy.diff(ends) == count - 1).all())
+
+
+def _parse_text(text):
+    # parses idx,x,y,z lines into an Nx4 float64 array, returns (array, complete),
+    # where complete is False if parsing stopped at an invalid line. Like the original
+    # reader, an empty first line gives no points; whitespace at the end is ignored
+    text = text.rstrip()
+    line_count = text.count('\n') + 1 if len(text) > 0 else 0
+    # joining the lines loses the row boundaries; only use the result when every
+    # line has four fields and all of them were parsed (older numpy versions
+    # return the values before an invalid one instead of raising)
+    if _fields_per_line(text, 4):
+        try:
+            data = numpy.fromstring(text.replace('\n', ','), dtype=numpy.float64, sep=',')
+            if data.size == line_count * 4:
+                return data.reshape((-1, 4)), True
+        except ValueError:
+            pass
+
+    # the text contains invalid data; only keep the lines before the first invalid line
+    rows = []
+    complete = True
+    for line in text.split('\n'):
+        try:
+            idx, x, y, z = [float(v) for v in line.split(',')]
+        except ValueError:
+            complete = False
+            break
+        rows.append((idx, x, y, z))
+    return numpy.array(rows, dtype=numpy.float64).reshape((-1, 4)), complete
+
+
+def parse_text_frame(text, step=1):
+    """Parses the contents of a text frame file into an Nx4 (idx,x,y,z) float64 array.
+
+    Just like the original line-by-line reader, parsing stops at the
+    first line that can't be parsed. With a step > 1, only every step-th
+    line is parsed (starting with the first one); the lines in between
+    are skipped without being checked, like the reader's skip setting did.
+    """
+    if step > 1:
+        text = '\n'.join(text.rstrip().split('\n')[::step])
+    return _parse_text(text)[0]
+
+
+def read_text_frame(path, step=1):
+    """Reads a text frame file into an Nx4 (idx,x,y,z) float64 array, see parse_text_frame."""
+    with open(path) as f:
+        return parse_text_frame(f.read(), step)
+
+
+def iter_text_frame(path, chunk_size=65536, step=1):
+    """Reads a text frame file in blocks of (at most) chunk_size lines,
+    yields an Nx4 (idx,x,y,z) float64 array for every block.
+
+    Only one block is kept in memory at a time. Just like read_text_frame,
+    reading stops at the first line that can't be parsed, and with a
+    step > 1 only every step-th line of the file is parsed.
+    """
+    with open(path) as f:
+        # the position in the next block of the first line to parse
+        first = 0
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if len(lines) == 0:
+                return
+
+            data, complete = _parse_text(''.join(lines[first::step]))
+            first = (first - len(lines)) % step
+            if len(data) > 0:
+                yield data
+
+            if not complete or len(lines) < chunk_size:
+                return
+
+
+def lod_order(count):
+    """Gives the level-of-detail order for a frame with the specified
+    number of points; a (reproducible) random permutation."""
+    return numpy.random.RandomState(0).permutation(count)
+
+
+def write_frame(path, coords, indices=None, lod=False, baked=False):
+    """Writes an Nx3 coordinates array (and optional idx column) to a binary
+    frame file. When lod is True, the points are stored in level-of-detail order.
+    When baked is True, the coordinates are marked as final (see FLAG_BAKED)."""
+    coords = numpy.asarray(coords).reshape((-1, 3))
+    flags = 0 if indices is None else FLAG_INDEX
+
+    if baked:
+        flags |= FLAG_BAKED
+
+    if lod:
+        flags |= FLAG_LOD
+        order = lod_order(len(coords))
+        coords = coords[order]
+        indices = None if indices is None else numpy.asarray(indices)[order]
+
+    coords = numpy.ascontiguousarray(coords, dtype=COORDS_DTYPE)
+
+    with open(path, 'wb') as f:
+        f.write(PCF_HEADER.pack(PCF_MAGIC, PCF_VERSION, flags, len(coords), 0))
+        f.write(coords.tobytes())
+        if indices is not None:
+            f.write(numpy.ascontiguousarray(indices, dtype=INDEX_DTYPE).tobytes())
+
+
+def read_frame_header(f):
+    """Reads and validates the header of an opened binary frame file, returns (flags, count)."""
+    header = f.read(PCF_HEADER.size)
+    if len(header) != PCF_HEADER.size:
+        raise FormatError('Incomplete point cloud frame header')
+    magic, version, flags, count, _ = PCF_HEADER.unpack(header)
+    if magic != PCF_MAGIC:
+        raise FormatError('Not a point cloud frame file')
+    if version > PCF_VERSION:
+        raise FormatError('Unsupported point cloud frame file version: {0}'.format(version))
+    return flags, count
+
+
+def file_flags(path):
+    """Gives the flags of a binary frame file or container file."""
+    with open(path, 'rb') as f:
+        magic, version, flags, _, _ = PCF_HEADER.unpack(f.read(PCF_HEADER.size))
+    if magic not in (PCF_MAGIC, PCC_MAGIC):
+        raise FormatError('Not a point cloud frame or container file')
+    return flags
+
+
+def read_frame(path):
+    """Memory-maps a binary frame file.
+
+    Returns a (coords, indices) tuple, where coords is a read-only Nx3 float32
+    array and indices is an array of N uint32 values, or None if the
+    file doesn't contain an idx column.
+    """
+    with open(path, 'rb') as f:
+        flags, count = read_frame_header(f)
+
+    if count == 0:  # empty files can't be memory-mapped
+        indices = numpy.zeros(0, dtype=INDEX_DTYPE) if flags & FLAG_INDEX else None
+        return numpy.zeros((0, 3), dtype=COORDS_DTYPE), indices
+
+    coords = numpy.memmap(path, dtype=COORDS_DTYPE, mode='r', offset=PCF_HEADER.size, shape=(count, 3))
+    indices = None
+    if flags & FLAG_INDEX:
+        offset = PCF_HEADER.size + count * 3 * COORDS_DTYPE.itemsize
+        indices = numpy.memmap(path, dtype=INDEX_DTYPE, mode='r', offset=offset, shape=(count,))
+    return coords, indices
+
+
+class Container(object):
+    """Read access to the frames of a container file, through a memory map."""
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            header = f.read(PCC_HEADER.size)
+            if len(header) != PCC_HEADER.size:
+                raise FormatError('Incomplete point cloud container header')
+            magic, version, self.flags, frames, _ = PCC_HEADER.unpack(header)
+            if magic != PCC_MAGIC:
+                raise FormatError('Not a point cloud container file')
+            if version > PCC_VERSION:
+                raise FormatError('Unsupported point cloud container version: {0}'.format(version))
+            self.index = numpy.fromfile(f, dtype=PCC_INDEX_DTYPE, count=frames)
+
+        if len(self.index) != frames:
+            raise FormatError('Incomplete point cloud container frame index')
+
+        self._data = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def point_count(self, frame):
+        return int(self.index[frame]['count'])
+
+    def is_delta(self):
+        return self.flags & FLAG_DELTA != 0
+
+    def keyframe(self, frame):
+        """Gives the number of the keyframe of a frame in a delta container."""
+        return int(self.index[frame]['keyframe'])
+
+    def frame(self, frame):
+        """Returns a (coords, indices) tuple for the specified frame, like read_frame.
+        Frames of delta containers are reconstructed from their keyframe."""
+        if not self.is_delta():
+            return self._stored(frame)
+
+        key_coords, slots = self._stored(self.keyframe(frame))
+        if self.keyframe(frame) == frame:
+            return key_coords, slots
+
+        coords = numpy.array(key_coords)
+        delta_coords, delta_slots = self._stored(frame)
+        coords[delta_slots] = delta_coords
+        return coords, slots
+
+    def delta(self, frame):
+        """Returns the (coords, slot numbers) of the points of a frame in a delta
+        container that differ from its keyframe; both empty for keyframes."""
+        if self.keyframe(frame) == frame:
+            return numpy.zeros((0, 3), dtype=COORDS_DTYPE), numpy.zeros(0, dtype=INDEX_DTYPE)
+        return self._stored(frame)
+
+    def _stored(self, frame):
+        # the (coords, indices) as stored in the file
+        offset = int(self.index[frame]['offset'])
+        count = int(self.index[frame]['count'])
+        has_index = self.flags & FLAG_INDEX
+
+        if count == 0:
+            indices = numpy.zeros(0, dtype=INDEX_DTYPE) if has_index else None
+            return numpy.zeros((0, 3), dtype=COORDS_DTYPE), indices
+
+        if self._data is None:
+            self._data = numpy.memmap(self.path, dtype=numpy.uint8, mode='r')
+
+        end = offset + count * 3 * COORDS_DTYPE.itemsize
+        coords = self._data[offset:end].view(COORDS_DTYPE).reshape((count, 3))
+        indices = None
+        if has_index:
+            indices = self._data[end:end + count * INDEX_DTYPE.itemsize].view(INDEX_DTYPE)
+        return coords, indices
+
+
+_containers = {}
+
+
+def open_container(path):
+    """Returns a (cached) Container instance for the specified path;
+    the cache is invalidated when the file's modification time changes."""
+    mtime = os.path.getmtime(path)
+    cached = _containers.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, Container(path))
+        _containers[path] = cached
+    return cached[1]
+
+
+def write_container(path, frames, include_index=True, lod=False):
+    """Writes a container file.
+
+    Args:
+      - frames: a list of (coords, indices) tuples; every coords value is an
+                Nx3 array, indices is an array of N values (or None)
+      - lod: store the points of all frames in level-of-detail order
+    """
+    index = numpy.zeros(len(frames), dtype=PCC_INDEX_DTYPE)
+    flags = FLAG_INDEX if include_index else 0
+    if lod:
+        flags |= FLAG_LOD
+
+    with open(path, 'wb') as f:
+        # regular containers are version 1, only delta containers need version 2
+        f.write(PCC_HEADER.pack(PCC_MAGIC, 1, flags, len(frames), 0))
+        f.write(index.tobytes())  # placeholder, rewritten when all frame offsets are known
+
+        for i, (coords, indices) in enumerate(frames):
+            coords = numpy.asarray(coords).reshape((-1, 3))
+            if include_index and indices is None:
+                indices = numpy.arange(len(coords))
+            if lod:
+                order = lod_order(len(coords))
+                coords = coords[order]
+                indices = None if indices is None else numpy.asarray(indices)[order]
+
+            coords = numpy.ascontiguousarray(coords, dtype=COORDS_DTYPE)
+            index[i]['offset'] = f.tell()
+            index[i]['count'] = len(coords)
+            f.write(coords.tobytes())
+            if include_index:
+                f.write(numpy.ascontiguousarray(indices, dtype=INDEX_DTYPE).tobytes())
+
+        f.seek(PCC_HEADER.size)
+        f.write(index.tobytes())
+
+
+def write_delta_container(path, frames, keyframe_interval=30, threshold=0.0):
+    """Writes a delta container file.
+
+    Args:
+      - frames: a (re-iterable) list of (coords, indices) tuples; every coords value
+                is an Nx3 array, indices is an array of the N idx values
+      - keyframe_interval: number of frames between keyframes
+      - threshold: points that move less than this distance (along every axis)
+                   relative to their keyframe are considered unchanged
+    """
+    # the slots; all idx values in the sequence
+    slots = numpy.zeros(0, dtype=INDEX_DTYPE)
+    for coords, indices in frames:
+        if indices is None:
+            raise FormatError('Delta containers need frames with an idx column')
+        slots = numpy.union1d(slots, numpy.asarray(indices, dtype=INDEX_DTYPE))
+
+    index = numpy.zeros(len(frames), dtype=PCC_INDEX_DTYPE)
+    flags = FLAG_INDEX | FLAG_DELTA
+
+    with open(path, 'wb') as f:
+        f.write(PCC_HEADER.pack(PCC_MAGIC, PCC_VERSION, flags, len(frames), 0))
+        f.write(index.tobytes())  # placeholder, rewritten when all frame offsets are known
+
+        keyframe = None
+        key_coords = None
+        for i, (coords, indices) in enumerate(frames):
+            full = numpy.zeros((len(slots), 3), dtype=COORDS_DTYPE)
+            full[numpy.searchsorted(slots, numpy.asarray(indices, dtype=INDEX_DTYPE))] = numpy.asarray(coords).reshape((-1, 3))
+
+            if keyframe is None or i - keyframe >= keyframe_interval:
+                keyframe = i
+                key_coords = full
+                stored_coords, stored_indices = full, slots
+            else:
+                changed = numpy.nonzero((numpy.abs(full - key_coords) > threshold).any(axis=1))[0]
+                stored_coords, stored_indices = full[changed], changed
+
+            index[i]['offset'] = f.tell()
+            index[i]['count'] = len(stored_coords)
+            index[i]['keyframe'] = keyframe
+            f.write(numpy.ascontiguousarray(stored_coords, dtype=COORDS_DTYPE).tobytes())
+            f.write(numpy.ascontiguousarray(stored_indices, dtype=INDEX_DTYPE).tobytes())
+
+        f.seek(PCC_HEADER.size)
+        f.write(index.tobytes())
+
+
+class _FrameFiles(object):
+    # lazily loads the frames from a sequence of frame files, so
+    # write_container only needs to keep one frame in memory at a time
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        for path in self.paths:
+            if path.endswith('.pcf'):
+                yield read_frame(path)
+            else:
+                data = read_text_frame(path)
+                yield data[:, 1:4], data[:, 0]
+
+
+def sequence_paths(pattern):
+    """Returns the paths of a sequence of frame files, where pattern is a
+    path containing %d for the frame number, starting at 0."""
+    paths = []
+    while os.path.isfile(pattern % len(paths)):
+        paths.append(pattern % len(paths))
+    return paths
+
+
+def pack_sequence(pattern, dest, include_index=True, lod=False):
+    """Packs a sequence of frame files (text or binary) into a container file."""
+    paths = sequence_paths(pattern)
+    write_container(dest, _FrameFiles(paths), include_index, lod)
+    logging.getLogger().info('packed {0} frames into {1}'.format(len(paths), dest))
+    return len(paths)
+
+
+def iter_frame_chunks(path, chunk_size=65536):
+    """Yields the unscaled coordinates of a (text or binary) frame file
+    in Nx3 arrays of (at most) chunk_size points."""
+    if path.endswith('.pcf'):
+        coords, _ = read_frame(path)
+        for start in range(0, len(coords), chunk_size):
+            yield coords[start:start + chunk_size]
+        return
+
+    for data in iter_text_frame(path, chunk_size):
+        yield data[:, 1:4]
+
+
+def _iter_sequence(path, chunk_size):
+    # yields, for every frame of a sequence, an iterable of coordinate blocks
+    if path.endswith('.pcc'):
+        container = Container(path)
+        for frame in range(len(container)):
+            coords, _ = container.frame(frame)
+            yield (coords[start:start + chunk_size] for start in range(0, len(coords), chunk_size))
+        return
+
+    for frame_path in sequence_paths(path):
+        yield iter_frame_chunks(frame_path, chunk_size)
+
+
+def index_sequence(path, chunk_size=65536):
+    """Reads all frames of a sequence (a frame file pattern or a container file) and
+    returns its metadata; the frames are read in blocks, so memory use is bounded."""
+    counts = []
+    mins = []
+    maxs = []
+
+    for chunks in _iter_sequence(path, chunk_size):
+        count = 0
+        lo = None
+        hi = None
+        for coords in chunks:
+            if len(coords) == 0:
+                continue
+            count += len(coords)
+            lo = coords.min(axis=0) if lo is None else numpy.minimum(lo, coords.min(axis=0))
+            hi = coords.max(axis=0) if hi is None else numpy.maximum(hi, coords.max(axis=0))
+
+        counts.append(count)
+        mins.append(None if lo is None else [float(v) for v in lo])
+        maxs.append(None if hi is None else [float(v) for v in hi])
+
+    bounded = [i for i in range(len(counts)) if mins[i] is not None]
+    return {
+        'version': 1,
+        'frames': len(counts),
+        'counts': counts,
+        'min': mins,
+        'max': maxs,
+        'global_min': [min(mins[i][axis] for i in bounded) for axis in range(3)] if bounded else None,
+        'global_max': [max(maxs[i][axis] for i in bounded) for axis in range(3)] if bounded else None}
+
+
+def sidecar_path(path):
+    """Gives the path of the metadata sidecar file of a sequence."""
+    return path.replace('%d', '') + '.meta.json'
+
+
+def write_sidecar(path, metadata=None):
+    """Writes the metadata sidecar file of a sequence (indexing it
+    first, when no metadata is given), returns the metadata."""
+    if metadata is None:
+        metadata = index_sequence(path)
+    with open(sidecar_path(path), 'w') as f:
+        json.dump(metadata, f)
+    return metadata
+
+
+_sidecars = {}
+
+
+def read_sidecar(path):
+    """Gives the (cached) metadata of a sequence, or None if it doesn't have a sidecar file."""
+    sidecar = sidecar_path(path)
+    try:
+        mtime = os.path.getmtime(sidecar)
+    except OSError:
+        return None
+
+    cached = _sidecars.get(sidecar)
+    if cached is None or cached[0] != mtime:
+        with open(sidecar) as f:
+            cached = (mtime, json.load(f))
+        _sidecars[sidecar] = cached
+    return cached[1]
+
+
+def pack_delta_sequence(pattern, dest, keyframe_interval=30, threshold=0.0):
+    """Packs a sequence of frame files (text or binary, with idx column) into a delta container file."""
+    paths = sequence_paths(pattern)
+    write_delta_container(dest, _FrameFiles(paths), keyframe_interval, threshold)
+    logging.getLogger().info('packed {0} frames into delta container {1}'.format(len(paths), dest))
+    return len(paths)
+
+
+def convert_text_frame(src, dest, include_index=True, lod=False):
+    """Converts a text frame file into a binary frame file."""
+    data = read_text_frame(src)
+    write_frame(dest, data[:, 1:4], data[:, 0] if include_index else None, lod)
+    return len(data)
+
+
+def convert_directory(src_dir, dest_dir=None, pattern='*.txt', include_index=True, lod=False):
+    """Converts all text frame files in a directory into binary frame
+    files with the same name and a .pcf extension, returns the converted paths."""
+    dest_dir = dest_dir or src_dir
+    if not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir)
+
+    result = []
+    for src in sorted(glob.glob(os.path.join(src_dir, pattern))):
+        dest = os.path.join(dest_dir, os.path.splitext(os.path.basename(src))[0] + '.pcf')
+        count = convert_text_frame(src, dest, include_index, lod)
+        logging.getLogger().info('converted {0} ({1} points) to {2}'.format(src, count, dest))
+        result.append(dest)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Point cloud frame file tools')
+    commands = parser.add_subparsers(dest='command')
+
+    convert = commands.add_parser('convert', help='convert a directory of text frame files to binary frame files')
+    convert.add_argument('src', help='directory containing the text frame files')
+    convert.add_argument('dest', nargs='?', help='output directory (default: same as src)')
+    convert.add_argument('--pattern', default='*.txt', help='file name pattern of the text frame files')
+    convert.add_argument('--no-index', action='store_true', help="don't store the idx column")
+    convert.add_argument('--lod', action='store_true', help='store the points in level-of-detail order')
+
+    pack = commands.add_parser('pack', help='pack a sequence of frame files into a container file')
+    pack.add_argument('pattern', help='path of the frame files, with %%d for the frame number (for example: frame%%d.txt)')
+    pack.add_argument('dest', help='path of the container file to create')
+    pack.add_argument('--no-index', action='store_true', help="don't store the idx column")
+    pack.add_argument('--lod', action='store_true', help='store the points in level-of-detail order')
+
+    delta = commands.add_parser('delta', help='pack a sequence of frame files into a delta container file')
+    delta.add_argument('pattern', help='path of the frame files, with %%d for the frame number (for example: frame%%d.txt)')
+    delta.add_argument('dest', help='path of the delta container file to create')
+    delta.add_argument('--keyframe-interval', type=int, default=30, help='number of frames between keyframes')
+    delta.add_argument('--threshold', type=float, default=0.0, help='points that move less than this (unscaled) distance are considered unchanged')
+
+    index = commands.add_parser('index', help='create the metadata sidecar file of a sequence')
+    index.add_argument('path', help='path of the frame files, with %%d for the frame number, or a container file')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'convert':
+        paths = convert_directory(args.src, args.dest, args.pattern, not args.no_index, args.lod)
+        print('converted {0} files'.format(len(paths)))
+    elif args.command == 'pack':
+        count = pack_sequence(args.pattern, args.dest, not args.no_index, args.lod)
+        print('packed {0} frames'.format(count))
+    elif args.command == 'delta':
+        count = pack_delta_sequence(args.pattern, args.dest, args.keyframe_interval, args.threshold)
+        print('packed {0} frames'.format(count))
+    elif args.command == 'index':
+        metadata = write_sidecar(args.path)
+        print('indexed {0} frames into {1}'.format(metadata['frames'], sidecar_path(args.path)))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,746 @@
+"""Parsed point cloud frames for the Point Cloud Loader addon, without blender.
+
+PointCloudFrameFile reads a frame (see point_cloud_formats for the file formats)
+and applies the load-time settings of the addon: scale, offset, multiply, bounds,
+skipping and decimation. The loaded points can be queried with a spatial index
+(PointCloudSpatialIndex) and the durations of the stages of loading are kept by
+PointCloudLoadTimings. PointCloudFrameCache keeps loaded frames within a memory
+budget and PointCloudGridMesher triangulates frames that were recorded as depth
+images.
+"""
+
+import contextlib
+import csv
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy
+
+import point_cloud_formats
+
+logger = logging.getLogger(__name__)
+
+
+# A class that represents one file (frame) of point cloud data,
+# this class takes care of parsing the file's data into python data (arrays)
+class PointCloudFrameFile:
+    def __init__(self, path, skip=0, logger=None, minBounds=None, maxBounds=None, offset=None, multiply=None, scale=100.0, frame=None):
+        self.path = path
+        self.frame = frame # the number of the frame to read when path is a container file
+        self.logger = logger
+        self.minBounds = minBounds
+        self.maxBounds = maxBounds
+        self.offset = offset
+        self.multiply = multiply
+        self.scale = scale # all values in the file are multiplied by this factor
+
+        self.skip = skip # after every read point, skip this number of points
+
+        # load-time decimation of the active points; None, 'VOXEL' (keep one point per voxelSize grid cell),
+        # 'RANDOM' (keep a random decimationRatio of the points) or 'TARGET' (keep at most targetPoints random points)
+        self.decimation = None
+        self.voxelSize = 1.0
+        self.decimationRatio = 0.1
+        self.targetPoints = 100000
+
+        self.loaded = False
+        self.baked = None # see isBaked
+        self.levels = {} # divisor -> Nx3 array for the points of a coarse level of detail
+        self.levelSelections = {} # divisor -> selection of pointsArray for that level of detail
+        self.indexes = {} # divisor -> PointCloudSpatialIndex for the points of that level of detail
+        self.activeIndex = None # PointCloudSpatialIndex for activePointsArray, when it differs from pointsArray
+        self.crops = 0 # the number of times the active points were cropped, see _cropSelection
+        self.lodMask = None # for files in level-of-detail order; which of the (skipped) points in the file are active
+        self.pointsArray = None # Nx3 array for the points defined in the file
+        self.pointIndices = None # the idx values of the points in pointsArray, or None if the file has no idx column
+        self.activePointsArray = None # the active points before decimation; pointsArray itself without decimation
+        self.activePointIndices = None # the idx values of the points in activePointsArray, or None
+        self.allPointsArray = None # Nx3 array for all points; also the non-active ones
+        self.rejectedPointsArray = None # Nx3 array for all points which are reject because of ouf enforced bounds
+
+        if self.logger == None:
+            self.logger = logging.getLogger(__name__) # default logger of this module
+
+    # the list-of-tuples versions of the point arrays, for backwards compatibility;
+    # these are converted on access, so prefer the *Array attributes in performance-critical code
+    @property
+    def points(self):
+        return self._tuples(self.get_points_array())
+
+    @property
+    def all_points(self):
+        return self._tuples(self.get_all_points_array())
+
+    @property
+    def rejected_points(self):
+        self._ensureLoaded()
+        return self._tuples(self.rejectedPointsArray)
+
+    def _tuples(self, array):
+        return [tuple(p) for p in array.tolist()]
+
+    def _ensureLoaded(self):
+        if self.loaded != True:
+            self._loadFrameData()
+
+    # loads the file's data (if it wasn't loaded yet) and returns this instance
+    def load(self):
+        self._ensureLoaded()
+        return self
+
+    # transforms an axis-aligned bounding box of unscaled coordinates from the file
+    # into a bounding box of loaded coordinates, using the scale and load-time modifiers;
+    # baked files already contain loaded coordinates, so their bounds don't change
+    def transformBounds(self, minimum, maximum):
+        if self.isBaked():
+            return numpy.array(minimum, dtype=numpy.float64), numpy.array(maximum, dtype=numpy.float64)
+
+        lo = numpy.array(minimum, dtype=numpy.float64) * self.scale
+        hi = numpy.array(maximum, dtype=numpy.float64) * self.scale
+
+        if self.multiply != None:
+            multiply = numpy.array(self.multiply[0:3], dtype=numpy.float64)
+            # negative multipliers swap the minimum and maximum
+            lo, hi = numpy.minimum(lo * multiply, hi * multiply), numpy.maximum(lo * multiply, hi * multiply)
+
+        if self.offset != None:
+            lo = lo + numpy.array(self.offset[0:3], dtype=numpy.float64)
+            hi = hi + numpy.array(self.offset[0:3], dtype=numpy.float64)
+
+        return lo, hi
+
+    # gives a (hashable) value that identifies this file and all its load-time settings;
+    # two files with the same key produce the same points
+    def key(self):
+        def values(vector):
+            return None if vector == None else tuple(vector)
+        decimation = (self.decimation, self.voxelSize, self.decimationRatio, self.targetPoints) if self.decimation != None else None
+        return (self.path, self.frame, self.skip, self.scale, values(self.minBounds), values(self.maxBounds), values(self.offset), values(self.multiply), decimation)
+
+    def get_all_points(self):
+        return self.all_points
+
+    def get_points(self):
+        return self.points
+
+    def get_all_points_array(self):
+        self._ensureLoaded()
+        return self.allPointsArray
+
+    # gives the active points; with a divisor > 1, only (about) 1/divisor-th
+    # of them, evenly spread over the frame (a coarse level of detail)
+    def get_points_array(self, divisor=1):
+        self._ensureLoaded()
+        if divisor <= 1:
+            return self.pointsArray
+
+        # levels are derived from the loaded points, so switching levels doesn't need a re-parse
+        if divisor not in self.levels:
+            self.levels[divisor] = self.pointsArray[self._levelSelection(divisor)]
+        return self.levels[divisor]
+
+    # gives the idx values of the active points (of the specified level of detail),
+    # in the same order as get_points_array, or None if the file has no idx column
+    def get_point_indices(self, divisor=1):
+        self._ensureLoaded()
+        if self.pointIndices is None or divisor <= 1:
+            return self.pointIndices
+        return self.pointIndices[self._levelSelection(divisor)]
+
+    # gives the spatial index of the active points (of the specified level of detail);
+    # it's built on first use and kept with the loaded points
+    def spatialIndex(self, divisor=1):
+        self._ensureLoaded()
+        key = max(divisor, 1)
+        if key not in self.indexes:
+            self.indexes[key] = PointCloudSpatialIndex(self.get_points_array(key))
+        return self.indexes[key]
+
+    # gives the active points inside an axis-aligned box; unlike the minBounds/maxBounds
+    # load-time settings, this doesn't need a reload when the box changes
+    def get_points_in_box(self, minimum, maximum, divisor=1):
+        return self.get_points_array(divisor)[self.spatialIndex(divisor).box(minimum, maximum)]
+
+    # gives the active points within radius of center
+    def get_points_in_radius(self, center, radius, divisor=1):
+        return self.get_points_array(divisor)[self.spatialIndex(divisor).radius(center, radius)]
+
+    # gives (points, indices) for the active points inside an axis-aligned box, of the specified level of
+    # detail; indices is None if the file has no idx column. The points are cropped before the decimation
+    # setting is applied, so the decimation only selects from the points inside the box
+    def get_cropped_points(self, minimum, maximum, divisor=1):
+        self._ensureLoaded()
+        selection = self._cropSelection(minimum, maximum)
+        if self.activePointsArray is not self.pointsArray:
+            selection = selection[self._decimation(self.activePointsArray[selection])]
+        selection = self._cropLevelSelection(selection, divisor)
+
+        indices = None if self.activePointIndices is None else self.activePointIndices[selection]
+        return self.activePointsArray[selection], indices
+
+    # gives the (sorted) indices of the active points inside an axis-aligned box. The first crop of a
+    # loaded frame simply tests all points; the spatial index is only built when the frame is cropped
+    # again (when a cached frame is loaded again, or with other bounds), or when it was already built
+    def _cropSelection(self, minimum, maximum):
+        if self.activePointsArray is self.pointsArray:
+            index = self.indexes.get(1)
+        else:
+            index = self.activeIndex
+
+        self.crops += 1
+        if index == None and self.crops == 1:
+            minimum = numpy.array(minimum[0:3], dtype=numpy.float64)
+            maximum = numpy.array(maximum[0:3], dtype=numpy.float64)
+            points = self.activePointsArray
+            return numpy.nonzero(((points >= minimum) & (points <= maximum)).all(axis=1))[0]
+
+        if index == None:
+            if self.activePointsArray is self.pointsArray:
+                index = self.spatialIndex(1)
+            else:
+                index = self.activeIndex = PointCloudSpatialIndex(self.activePointsArray)
+        return index.box(minimum, maximum)
+
+    # gives the part of a (sorted) selection of the active points that's in a coarse level of detail
+    def _cropLevelSelection(self, selection, divisor):
+        if divisor <= 1:
+            return selection
+        if self.lodMask is not None:
+            # the file is in level-of-detail order (and not decimated); the level's points come first
+            return selection[selection < self._levelSelection(divisor).stop]
+        return selection[self._randomSelection(len(selection), int(math.ceil(len(selection) / float(divisor))))]
+
+    # gives the selection (a slice or index array) of pointsArray for a coarse level of detail
+    def _levelSelection(self, divisor):
+        if divisor not in self.levelSelections:
+            if self.lodMask is not None:
+                # the file is in level-of-detail order; use the active points from the first part of the file
+                end = int(math.ceil(len(self.lodMask) / float(divisor)))
+                self.levelSelections[divisor] = slice(0, numpy.count_nonzero(self.lodMask[:end]))
+            else:
+                self.levelSelections[divisor] = self._randomSelection(len(self.pointsArray), int(math.ceil(len(self.pointsArray) / float(divisor))))
+        return self.levelSelections[divisor]
+
+    # returns True if the file's points are stored in level-of-detail order
+    def isLodOrdered(self):
+        if self.frame != None:
+            return point_cloud_formats.open_container(self.path).flags & point_cloud_formats.FLAG_LOD != 0
+        if self.isBinary():
+            return point_cloud_formats.file_flags(self.path) & point_cloud_formats.FLAG_LOD != 0
+        return False
+
+    def isBinary(self):
+        return self.path.endswith(".pcf")
+
+    # returns True for baked binary frame files (see PointCloudSequenceBaker), of
+    # which the points are final; the load-time settings were applied when baking
+    def isBaked(self):
+        if self.baked == None:
+            self.baked = self.frame == None and self.isBinary() and point_cloud_formats.file_flags(self.path) & point_cloud_formats.FLAG_BAKED != 0
+        return self.baked
+
+    # reads the complete file, returns an Nx3 (x,y,z) coordinates array;
+    # binary frame files and container files are memory-mapped instead of read
+    def _readData(self):
+        return self._readFrame()[0]
+
+    # like _readData, but returns (coords, indices), where indices is an array with the idx
+    # values, or None if the file has no idx column. With a step > 1, only every step-th point
+    # is read; text files only parse those lines, like the original reader did
+    def _readFrame(self, step=1):
+        timings = PointCloudLoadTimings.instance()
+
+        if self.frame != None or self.isBinary():
+            with timings.measure('read'):
+                if self.frame != None:
+                    coords, indices = point_cloud_formats.open_container(self.path).frame(self.frame)
+                else:
+                    coords, indices = point_cloud_formats.read_frame(self.path)
+                return coords[::step], None if indices is None else indices[::step]
+
+        with timings.measure('read'):
+            with open(self.path) as f:
+                text = f.read()
+
+        with timings.measure('parse'):
+            data = point_cloud_formats.parse_text_frame(text, step)
+            return data[:, 1:4], data[:, 0].astype(numpy.int64)
+
+    # the step between the points that are read for the skip setting;
+    # baked files were already skipped when they were baked
+    def _step(self):
+        return 1 if self.isBaked() else self.skip + 1
+
+    # reads the file in blocks, yields an Nx3 (x,y,z) coordinates array
+    # of (at most) chunkSize points for every block, with the skip setting applied
+    def _readChunks(self, chunkSize):
+        step = self._step()
+        blockSize = chunkSize * step # a multiple of step, so the skipping continues nicely across blocks
+
+        if self.frame != None or self.isBinary():
+            # memory-mapped; just yield slices
+            coords = self._readData()
+            for start in range(0, len(coords), blockSize):
+                yield coords[start:start+blockSize:step]
+            return
+
+        for data in point_cloud_formats.iter_text_frame(self.path, blockSize, step):
+            yield data[:, 1:4]
+
+    # applies the scale and load-time modifiers (but not the bounds) to an Nx3 array of coordinates from the file
+    def transformPoints(self, coords):
+        return self._modify(numpy.asarray(coords, dtype=numpy.float64) * self.scale)
+
+    def _modify(self, v):
+        if self.multiply != None:
+            v = v * numpy.array(self.multiply[0:3], dtype=numpy.float64)
+
+        if self.offset != None:
+            v = v + numpy.array(self.offset[0:3], dtype=numpy.float64)
+
+        return v
+
+    # applies scale, load-time modifiers and bounds to an Nx3 array of coordinates from the file;
+    # returns (all points, active points, rejected points) arrays
+    def _filter(self, coords):
+        v, active, reject = self._masks(coords)
+        return v, v[active], v[reject]
+
+    # like _filter, but returns (all points, active mask, rejected mask)
+    def _masks(self, coords):
+        if self.isBaked():
+            raw = v = numpy.asarray(coords, dtype=numpy.float64)
+        else:
+            raw = numpy.asarray(coords, dtype=numpy.float64) * self.scale
+            v = self._modify(raw)
+
+        reject = numpy.zeros(len(v), dtype=bool)
+
+        if self.minBounds != None:
+            reject |= (v < numpy.array(self.minBounds[0:3], dtype=numpy.float64)).any(axis=1)
+
+        if self.maxBounds != None:
+            reject |= (v > numpy.array(self.maxBounds[0:3], dtype=numpy.float64)).any(axis=1)
+
+        if self.isBaked():
+            return v, ~reject, reject
+
+        # the relevant (non-zero) points
+        return v, ~reject & (raw.prod(axis=1) != 0), reject
+
+    # applies the decimation setting to an Nx3 array of points; the selected points keep their order
+    def _decimate(self, points):
+        return points[self._decimation(points)]
+
+    # gives the selection (a slice or index array) of the points to keep for the decimation setting
+    def _decimation(self, points):
+        if self.decimation == 'VOXEL' and self.voxelSize > 0 and len(points) > 0:
+            # keep the first point of every occupied grid cell
+            cells = numpy.ascontiguousarray(numpy.floor(points / self.voxelSize).astype(numpy.int64))
+            cells = cells.view(numpy.dtype((numpy.void, cells.dtype.itemsize * 3))).reshape(-1)
+            unused, first = numpy.unique(cells, return_index=True)
+            return numpy.sort(first)
+
+        if self.decimation == 'RANDOM':
+            return self._randomSelection(len(points), int(round(len(points) * self.decimationRatio)))
+
+        if self.decimation == 'TARGET':
+            return self._randomSelection(len(points), self.targetPoints)
+
+        return slice(None)
+
+    # gives the (sorted) selection of count random items out of length items
+    def _randomSelection(self, length, count):
+        if count >= length:
+            return slice(None)
+        # a fixed seed, so reloading a frame gives the same points
+        return numpy.sort(numpy.random.RandomState(0).permutation(length)[:max(count, 0)])
+
+    def _loadFrameData(self):
+        self.logger.debug("Loading point cloud frame file: " + self.path + ("" if self.frame == None else " (frame {0})".format(self.frame)))
+        # skip some points (if skip > 0)
+        coords, indices = self._readFrame(self._step())
+
+        with PointCloudLoadTimings.instance().measure('filter'):
+            v, active, reject = self._masks(coords)
+            self.allPointsArray, self.activePointsArray, self.rejectedPointsArray = v, v[active], v[reject]
+            self.activePointIndices = None if indices is None else numpy.asarray(indices, dtype=numpy.int64)[active]
+            self.pointsArray, self.pointIndices = self.activePointsArray, self.activePointIndices
+
+            # the active points are kept next to the decimated ones, for cropping (see get_cropped_points)
+            selection = slice(None) if self.isBaked() else self._decimation(self.activePointsArray)
+            if not (isinstance(selection, slice) and selection == slice(None)):
+                self.pointsArray = self.activePointsArray[selection]
+                self.pointIndices = None if indices is None else self.activePointIndices[selection]
+        self.lodMask = active if self.decimation == None and self.isLodOrdered() else None
+        self.levels = {}
+        self.levelSelections = {}
+        self.indexes = {}
+        self.activeIndex = None
+        self.crops = 0
+        self.loaded = True
+
+        self.logger.debug('PointCloudFrameFile#_loadFrameData - points read (total/active): {0}/{1}'.format(str(len(self.allPointsArray)), str(len(self.pointsArray))))
+
+    # a streaming alternative to get_points_array for (very) large files; yields the active points
+    # in Nx3 arrays of chunkSize points (the last one can be smaller), without loading the complete file
+    # into memory. The decimation setting isn't applied, as it needs all points of the frame.
+    # All points and the rejected points are only kept when keepAll/keepRejected are True, in which
+    # case allPointsArray/rejectedPointsArray are set when all chunks have been consumed.
+    def iterChunks(self, chunkSize=65536, keepRejected=False, keepAll=False):
+        allPoints = []
+        rejectedPoints = []
+        # the bounds reject a varying number of points of every block that's read,
+        # so the active points are collected until there are enough for a chunk
+        pending = []
+        pendingCount = 0
+
+        for coords in self._readChunks(chunkSize):
+            v, points, rejected = self._filter(coords)
+
+            if keepAll:
+                allPoints.append(v)
+            if keepRejected:
+                rejectedPoints.append(rejected)
+
+            pending.append(points)
+            pendingCount += len(points)
+            while pendingCount >= chunkSize:
+                points = numpy.concatenate(pending)
+                yield points[:chunkSize]
+                pending = [points[chunkSize:]]
+                pendingCount -= chunkSize
+
+        if pendingCount > 0:
+            yield numpy.concatenate(pending)
+
+        if keepAll:
+            self.allPointsArray = numpy.concatenate(allPoints) if len(allPoints) > 0 else numpy.zeros((0, 3))
+        if keepRejected:
+            self.rejectedPointsArray = numpy.concatenate(rejectedPoints) if len(rejectedPoints) > 0 else numpy.zeros((0, 3))
+# end of class PointCloudFrameFile
+
+
+# A uniform grid over an Nx3 array of points, for range queries; the points are sorted by
+# grid cell, and every occupied cell knows the (exact) bounding box of its points. Queries only
+# test the points of the cells on the edge of the queried region, cells that are completely
+# inside the region are taken as a whole and cells that are completely outside are skipped.
+class PointCloudSpatialIndex:
+    POINTS_PER_CELL = 32 # (average) number of points per cell, when no cell size is specified
+
+    def __init__(self, points, cellSize=None):
+        self.points = points
+        self.cellSize = cellSize
+        self._build()
+
+    def _build(self):
+        # points with NaN or infinite coordinates aren't in any box or radius, so they're left out of
+        # the grid (they'd make its extent NaN); ids maps the points in the grid to their indices
+        ids = None
+        points = self.points
+        finite = numpy.isfinite(points).all(axis=1)
+        if not finite.all():
+            ids = numpy.nonzero(finite)[0]
+            points = points[ids]
+
+        count = len(points)
+        if count == 0:
+            self.order = numpy.zeros(0, dtype=numpy.int64)
+            self.starts = self.ends = numpy.zeros(0, dtype=numpy.int64)
+            self.cellMin = self.cellMax = numpy.zeros((0, 3))
+            return
+
+        lo = points.min(axis=0)
+        extent = points.max(axis=0) - lo
+
+        if self.cellSize == None:
+            cellsPerAxis = max(1, int(round((count / float(PointCloudSpatialIndex.POINTS_PER_CELL)) ** (1.0 / 3.0))))
+            self.cellSize = float(extent.max()) / cellsPerAxis
+        if self.cellSize <= 0:
+            self.cellSize = 1.0 # all points are in the same spot
+
+        dims = (extent // self.cellSize).astype(numpy.int64) + 1
+        cells = numpy.minimum(((points - lo) // self.cellSize).astype(numpy.int64), dims - 1)
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+        # a stable sort, so the points in a cell keep their order
+        self.order = numpy.argsort(keys, kind='mergesort')
+        unused, self.starts = numpy.unique(keys[self.order], return_index=True)
+        self.ends = numpy.append(self.starts[1:], count)
+
+        sortedPoints = points[self.order]
+        self.cellMin = numpy.minimum.reduceat(sortedPoints, self.starts, axis=0)
+        self.cellMax = numpy.maximum.reduceat(sortedPoints, self.starts, axis=0)
+
+        if ids is not None:
+            self.order = ids[self.order]
+
+    def nbytes(self):
+        return sum([array.nbytes for array in (self.order, self.starts, self.ends, self.cellMin, self.cellMax)])
+
+    # gives the (sorted) indices of the points inside the axis-aligned box; the box includes its sides
+    def box(self, minimum, maximum):
+        minimum = numpy.array(minimum[0:3], dtype=numpy.float64)
+        maximum = numpy.array(maximum[0:3], dtype=numpy.float64)
+
+        inside = (self.cellMin >= minimum).all(axis=1) & (self.cellMax <= maximum).all(axis=1)
+        overlap = (self.cellMax >= minimum).all(axis=1) & (self.cellMin <= maximum).all(axis=1)
+
+        candidates = self._gather(overlap & ~inside)
+        points = self.points[candidates]
+        keep = (points >= minimum).all(axis=1) & (points <= maximum).all(axis=1)
+        return numpy.sort(numpy.concatenate((self._gather(inside), candidates[keep])))
+
+    # gives the (sorted) indices of the points within radius of center
+    def radius(self, center, radius):
+        center = numpy.array(center[0:3], dtype=numpy.float64)
+        radius2 = float(radius) * float(radius)
+
+        # the squared distances from the center to the nearest and farthest points of every cell's bounding box
+        near = (numpy.maximum(self.cellMin - center, 0) + numpy.maximum(center - self.cellMax, 0)) ** 2
+        far = numpy.maximum(numpy.abs(center - self.cellMin), numpy.abs(center - self.cellMax)) ** 2
+        inside = far.sum(axis=1) <= radius2
+        overlap = near.sum(axis=1) <= radius2
+
+        candidates = self._gather(overlap & ~inside)
+        keep = ((self.points[candidates] - center) ** 2).sum(axis=1) <= radius2
+        return numpy.sort(numpy.concatenate((self._gather(inside), candidates[keep])))
+
+    # gives the indices of all points in the cells selected by the specified mask
+    def _gather(self, cellMask):
+        starts = self.starts[cellMask]
+        lengths = self.ends[cellMask] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+
+        # the positions in the sorted points; consecutive ranges of every selected cell
+        offsets = numpy.cumsum(lengths) - lengths
+        return self.order[numpy.repeat(starts - offsets, lengths) + numpy.arange(total)]
+# end of class PointCloudSpatialIndex
+
+
+# Keeps the durations of the stages of loading point cloud frames, for the last WINDOW
+# measurements of every stage; measurements can be made on any thread
+class PointCloudLoadTimings:
+    _instance = None
+    WINDOW = 120
+
+    # the stages, in the order they're shown in
+    STAGES = ('frame', 'path', 'read', 'parse', 'filter', 'crop', 'resize', 'write', 'skin', 'mesh update')
+
+    def instance():
+        if PointCloudLoadTimings._instance == None:
+            PointCloudLoadTimings._instance = PointCloudLoadTimings()
+        return PointCloudLoadTimings._instance
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = {} # stage -> deque with the last durations (in seconds)
+        self.lock = threading.Lock()
+
+    def add(self, stage, duration):
+        with self.lock:
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.window)
+            self.samples[stage].append(duration)
+
+    # use with a with statement to measure the duration of a stage
+    @contextlib.contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    # gives a (stage, number of measurements, average, 95th percentile) tuple (with durations
+    # in seconds) for every stage that has measurements
+    def stats(self):
+        with self.lock:
+            samples = [(stage, sorted(self.samples[stage])) for stage in self._stages()]
+
+        result = []
+        for stage, durations in samples:
+            if len(durations) > 0:
+                p95 = durations[int(math.ceil(len(durations) * 0.95)) - 1]
+                result.append((stage, len(durations), sum(durations) / len(durations), p95))
+        return result
+
+    def _stages(self):
+        return [stage for stage in PointCloudLoadTimings.STAGES if stage in self.samples] + sorted([stage for stage in self.samples if stage not in PointCloudLoadTimings.STAGES])
+
+    # writes the stats (in milliseconds) and all measurements in the window to a CSV file
+    def writeCsv(self, path):
+        with self.lock:
+            samples = [(stage, list(self.samples[stage])) for stage in self._stages()]
+
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'measurements', 'average (ms)', 'p95 (ms)'])
+            for stage, count, average, p95 in self.stats():
+                writer.writerow([stage, count, '{0:.3f}'.format(average * 1000.0), '{0:.3f}'.format(p95 * 1000.0)])
+
+            writer.writerow([])
+            writer.writerow(['stage', 'measurement', 'duration (ms)'])
+            for stage, durations in samples:
+                for idx, duration in enumerate(durations):
+                    writer.writerow([stage, idx, '{0:.3f}'.format(duration * 1000.0)])
+
+    def clear(self):
+        with self.lock:
+            self.samples = {}
+# end of class PointCloudLoadTimings
+
+
+# This class triangulates a point cloud that was recorded as a depth image (like the kinect
+# recordings), where the idx value of every point is its pixel number (row * width + column).
+# Every square of four neighbouring pixels gives two triangles, for the points that are present;
+# triangles with an edge longer than maxEdgeLength (depth discontinuities) are left out.
+class PointCloudGridMesher:
+    def __init__(self, width=640, maxEdgeLength=0.0):
+        self.width = width
+        self.maxEdgeLength = maxEdgeLength # 0 disables the edge length check
+
+    # gives an Nx3 array of (indices of) points for the triangles between points
+    # (an Nx3 array) with the specified idx values (an array of N pixel numbers)
+    def triangles(self, points, indices):
+        if len(points) == 0 or self.width < 2:
+            return numpy.zeros((0, 3), dtype=numpy.int32)
+
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        # pixel number -> point number, -1 for missing pixels
+        lookup = numpy.full(int(indices.max()) + self.width + 2, -1, dtype=numpy.int64)
+        lookup[indices] = numpy.arange(len(indices))
+
+        # every point is the top-left corner of a square, except for the points in the last column
+        a = numpy.nonzero(indices % self.width != self.width - 1)[0]
+        b = lookup[indices[a] + 1] # right
+        c = lookup[indices[a] + self.width] # below
+        d = lookup[indices[a] + self.width + 1] # below right
+
+        # the squares that have a right and a lower neighbour give an upper triangle,
+        # the ones that also have a lower right neighbour give a lower triangle as well
+        upper = (b >= 0) & (c >= 0)
+        a, b, c, d = a[upper], b[upper], c[upper], d[upper]
+        upper = numpy.ones(len(a), dtype=bool)
+        lower = d >= 0
+
+        if self.maxEdgeLength > 0:
+            points = numpy.asarray(points, dtype=numpy.float32)
+            maxLength2 = self.maxEdgeLength * self.maxEdgeLength
+            def short(i, j):
+                diff = points[i] - points[j]
+                return numpy.einsum('ij,ij->i', diff, diff) <= maxLength2
+
+            diagonal = short(b, c)
+            upper = diagonal & short(a, b) & short(a, c)
+            lower = lower & diagonal & short(b, d) & short(c, d)
+
+        triangles = numpy.concatenate((
+            numpy.column_stack((a[upper], c[upper], b[upper])),
+            numpy.column_stack((b[lower], c[lower], d[lower]))))
+
+        return triangles.astype(numpy.int32)
+# end of class PointCloudGridMesher
+
+
+# A process-wide, memory-bounded cache of parsed point cloud frame files;
+# files are identified by their path, modification time and load-time settings,
+# so objects that load the same file with the same settings share the cached data.
+# When the cache exceeds its budget, the least recently used files are evicted.
+class PointCloudFrameCache:
+    _instance = None
+
+    def instance():
+        if PointCloudFrameCache._instance == None:
+            PointCloudFrameCache._instance = PointCloudFrameCache()
+        return PointCloudFrameCache._instance
+
+    def __init__(self, budgetMB=512):
+        self.files = OrderedDict() # cache key -> loaded PointCloudFrameFile, least recently used first
+        self.sizes = {} # cache key -> size in bytes
+        self.size = 0
+        self.budget = budgetMB * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def setBudget(self, budgetMB):
+        with self.lock:
+            self.budget = budgetMB * 1024 * 1024
+            self._evict()
+
+    def _key(self, file):
+        try:
+            mtime = os.path.getmtime(file.path)
+        except OSError:
+            mtime = None
+        return file.key() + (mtime,)
+
+    def _fileSize(self, file):
+        arrays = [file.pointsArray, file.pointIndices, file.allPointsArray, file.rejectedPointsArray, file.lodMask]
+        # without decimation, the active points are the same arrays as the points
+        if file.activePointsArray is not file.pointsArray:
+            arrays += [file.activePointsArray, file.activePointIndices]
+        arrays += list(file.levels.values())
+        # (random) level-of-detail selections are index arrays, the others are slices
+        arrays += [selection for selection in list(file.levelSelections.values()) if isinstance(selection, numpy.ndarray)]
+        size = sum([array.nbytes for array in arrays if array is not None])
+        indexes = list(file.indexes.values()) + ([file.activeIndex] if file.activeIndex != None else [])
+        return size + sum([index.nbytes() for index in indexes])
+
+    def contains(self, file):
+        return self._key(file) in self.files
+
+    # gives the cached (loaded) version of the specified file, or None
+    def get(self, file):
+        key = self._key(file)
+        with self.lock:
+            cached = self.files.get(key)
+            if cached == None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.files.move_to_end(key)
+            return cached
+
+    # adds a loaded file to the cache; files that are already cached are measured again,
+    # as their levels of detail and spatial indexes are built on first use
+    def put(self, file):
+        key = self._key(file)
+        size = self._fileSize(file)
+        with self.lock:
+            if key in self.files:
+                self.files.move_to_end(key)
+                self.size += size - self.sizes[key]
+                self.sizes[key] = size
+                self._evict()
+                return
+
+            if size > self.budget:
+                return
+
+            self.files[key] = file
+            self.sizes[key] = size
+            self.size += size
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.budget and len(self.files) > 0:
+            key, file = self.files.popitem(last=False)
+            self.size -= self.sizes.pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.files.clear()
+            self.sizes.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+# end of class PointCloudFrameCache
@@ -0,0 +1,50 @@
+import unittest
+
+from osc_sender import OscSender, build_message
+
+
+class TestOscSenderPack(unittest.TestCase):
+
+    def setUp(self):
+        self.sender = OscSender()
+
+    def assertPacksLikeBuilder(self, addr, params):
+        self.assertEqual(build_message(addr, params).dgram, self.sender._pack(addr, params))
+
+    def test_float(self):
+        self.assertPacksLikeBuilder('/a/b/c', [1.5])
+
+    def test_int(self):
+        self.assertPacksLikeBuilder('/abc', [-42])
+
+    def test_no_arguments(self):
+        self.assertPacksLikeBuilder('/cue', [])
+
+    def test_multiple_arguments(self):
+        self.assertPacksLikeBuilder('/position', [0.5, 3, -2.25])
+
+    def test_address_lengths(self):
+        # the address is padded with 1-4 null bytes
+        for addr in ('/a', '/ab', '/abc', '/abcd', '/é'):
+            self.assertPacksLikeBuilder(addr, [1.0])
+
+    def test_templates_are_cached(self):
+        self.sender._pack('/a', [1.0])
+        self.sender._pack('/a', [2.0])
+        self.sender._pack('/a', [2])
+        self.assertEqual([('/a', (float,)), ('/a', (int,))], sorted(self.sender.templates.keys(), key=str))
+
+    def test_falls_back_for_other_types(self):
+        self.assertIsNone(self.sender._pack('/a', ['text']))
+        self.assertIsNone(self.sender._pack('/a', [True]))
+        self.assertIsNone(self.sender._pack('/a', [b'\x01']))
+
+    def test_falls_back_for_out_of_range_ints(self):
+        self.assertIsNone(self.sender._pack('/a', [2 ** 40]))
+
+    def test_falls_back_for_empty_address(self):
+        self.assertIsNone(self.sender._pack('', [1.0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import osc_timeline
+from osc_sender import build_message
+
+
+class TestOscTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'show.osct')
+
+    def message(self, addr, params=[]):
+        return build_message(addr, params).dgram
+
+    def test_round_trip(self):
+        events = [(0.0, self.message('/a/x', [1.5])), (0.5, self.message('/cue')), (1.25, self.message('/a/n', [3]))]
+        osc_timeline.write_timeline(self.path, 25.0, events, duration=4.0)
+
+        fps, duration, read_events = osc_timeline.read_timeline(self.path)
+        self.assertEqual(25.0, fps)
+        self.assertEqual(4.0, duration)
+        self.assertEqual(events, read_events)
+
+    def test_events_are_sorted(self):
+        events = [(1.0, self.message('/b', [2])), (0.0, self.message('/a', [1]))]
+        osc_timeline.write_timeline(self.path, 25.0, events)
+
+        fps, duration, read_events = osc_timeline.read_timeline(self.path)
+        self.assertEqual(sorted(events), read_events)
+        # without a duration, the timeline ends at its last event
+        self.assertEqual(1.0, duration)
+
+    def test_empty(self):
+        osc_timeline.write_timeline(self.path, 30.0, [])
+        self.assertEqual((30.0, 0.0, []), osc_timeline.read_timeline(self.path))
+
+    def test_not_a_timeline(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'#bundle\x00' * 8)
+        self.assertRaises(osc_timeline.FormatError, osc_timeline.read_timeline, self.path)
+
+    def test_incomplete(self):
+        osc_timeline.write_timeline(self.path, 25.0, [(0.0, self.message('/a/x', [1.5]))])
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with open(self.path, 'wb') as f:
+            f.write(data[:osc_timeline.TIMELINE_HEADER.size + 4])
+        self.assertRaises(osc_timeline.FormatError, osc_timeline.read_timeline, self.path)
+
+    def test_state_at(self):
+        events = [
+            (0.0, self.message('/a/x', [0.0])),
+            (0.0, self.message('/abcd/y', [1])),
+            (0.5, self.message('/cue')),
+            (1.0, self.message('/a/x', [2.0])),
+            (2.0, self.message('/a/x', [4.0]))]
+
+        state = osc_timeline.state_at(events, 1.5)
+        self.assertEqual(sorted([events[3][1], events[1][1]]), sorted(state))
+        self.assertEqual([], osc_timeline.state_at(events, 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
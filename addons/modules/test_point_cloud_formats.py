@@ -0,0 +1,262 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import point_cloud_formats
+
+
+class TestParseTextFrame(unittest.TestCase):
+
+    def test_parse(self):
+        data = point_cloud_formats.parse_text_frame('0,1.5,2,3\n1,-4,5,6e-1\n')
+        numpy.testing.assert_array_equal(data, [[0, 1.5, 2, 3], [1, -4, 5, 0.6]])
+
+    def test_empty(self):
+        self.assertEqual((0, 4), point_cloud_formats.parse_text_frame('').shape)
+
+    def test_stops_at_invalid_line(self):
+        data = point_cloud_formats.parse_text_frame('0,1,2,3\n1,x,5,6\n2,7,8,9\n')
+        numpy.testing.assert_array_equal(data, [[0, 1, 2, 3]])
+
+    def test_stops_at_empty_line(self):
+        data = point_cloud_formats.parse_text_frame('0,1,2,3\n\n1,4,5,6\n')
+        numpy.testing.assert_array_equal(data, [[0, 1, 2, 3]])
+
+    def test_wrong_field_counts_are_not_realigned(self):
+        self.assertEqual(0, len(point_cloud_formats.parse_text_frame('1,2,3\n4,5,6,7,8\n')))
+        self.assertEqual(0, len(point_cloud_formats.parse_text_frame('0,1,2,3,4\n' * 4)))
+
+    def test_empty_first_line(self):
+        self.assertEqual(0, len(point_cloud_formats.parse_text_frame('\n0,1,2,3\n')))
+
+    def test_step(self):
+        # the lines in between aren't parsed, so they don't stop parsing
+        data = point_cloud_formats.parse_text_frame('0,1,2,3\nx\n2,7,8,9\n\n4,2,2,2\n', step=2)
+        numpy.testing.assert_array_equal(data[:, 0], [0, 2, 4])
+
+    def test_iter_text_frame_step(self):
+        path = os.path.join(tempfile.mkdtemp(), 'frame0.txt')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(''.join('{0},1,1,1\n'.format(idx) if idx % 3 == 0 else 'skipped\n' for idx in range(20)))
+
+        for chunk_size in (1, 2, 3, 7, 100):
+            blocks = list(point_cloud_formats.iter_text_frame(path, chunk_size=chunk_size, step=3))
+            numpy.testing.assert_array_equal(numpy.arange(0, 20, 3), numpy.concatenate(blocks)[:, 0])
+
+    def test_iter_text_frame_stops_at_invalid_line(self):
+        path = os.path.join(tempfile.mkdtemp(), 'frame0.txt')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write('0,1,2,3\n1,4,5,6\n2,7,8\n3,1,1,1\n4,2,2,2\n5,3,3,3\n')
+
+        blocks = list(point_cloud_formats.iter_text_frame(path, chunk_size=2))
+        numpy.testing.assert_array_equal(numpy.concatenate(blocks), [[0, 1, 2, 3], [1, 4, 5, 6]])
+
+
+class FormatTestCase(unittest.TestCase):
+    # creates a temporary directory for the files of every test
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def frame(self, count, seed=0):
+        coords = numpy.random.RandomState(seed).uniform(-5.0, 5.0, (count, 3)).astype(numpy.float32)
+        return coords, numpy.arange(count) * 2
+
+
+class TestFrameFile(FormatTestCase):
+
+    def test_round_trip(self):
+        coords, indices = self.frame(100)
+        point_cloud_formats.write_frame(self.path('frame.pcf'), coords, indices)
+
+        read_coords, read_indices = point_cloud_formats.read_frame(self.path('frame.pcf'))
+        numpy.testing.assert_array_equal(coords, read_coords)
+        numpy.testing.assert_array_equal(indices, read_indices)
+        self.assertEqual(point_cloud_formats.FLAG_INDEX, point_cloud_formats.file_flags(self.path('frame.pcf')))
+
+    def test_without_indices(self):
+        coords, _ = self.frame(10)
+        point_cloud_formats.write_frame(self.path('frame.pcf'), coords)
+
+        read_coords, read_indices = point_cloud_formats.read_frame(self.path('frame.pcf'))
+        numpy.testing.assert_array_equal(coords, read_coords)
+        self.assertIsNone(read_indices)
+
+    def test_empty(self):
+        point_cloud_formats.write_frame(self.path('frame.pcf'), numpy.zeros((0, 3)), numpy.zeros(0))
+
+        read_coords, read_indices = point_cloud_formats.read_frame(self.path('frame.pcf'))
+        self.assertEqual((0, 3), read_coords.shape)
+        self.assertEqual(0, len(read_indices))
+
+    def test_lod_order_keeps_points_with_their_indices(self):
+        coords, indices = self.frame(100)
+        point_cloud_formats.write_frame(self.path('frame.pcf'), coords, indices, lod=True, baked=True)
+
+        read_coords, read_indices = point_cloud_formats.read_frame(self.path('frame.pcf'))
+        numpy.testing.assert_array_equal(coords[read_indices // 2], read_coords)
+        flags = point_cloud_formats.file_flags(self.path('frame.pcf'))
+        self.assertEqual(point_cloud_formats.FLAG_INDEX | point_cloud_formats.FLAG_LOD | point_cloud_formats.FLAG_BAKED, flags)
+
+    def test_convert_text_frame(self):
+        with open(self.path('frame0.txt'), 'w') as f:
+            f.write('3,1.5,2,3\n7,4,5,6\n')
+        self.assertEqual(2, point_cloud_formats.convert_text_frame(self.path('frame0.txt'), self.path('frame0.pcf')))
+
+        coords, indices = point_cloud_formats.read_frame(self.path('frame0.pcf'))
+        numpy.testing.assert_array_equal([[1.5, 2, 3], [4, 5, 6]], coords)
+        numpy.testing.assert_array_equal([3, 7], indices)
+
+    def test_not_a_frame_file(self):
+        with open(self.path('frame.pcf'), 'wb') as f:
+            f.write(b'0,1,2,3\n1,4,5,6\n')
+        self.assertRaises(point_cloud_formats.FormatError, point_cloud_formats.read_frame, self.path('frame.pcf'))
+
+
+class TestContainer(FormatTestCase):
+
+    def test_frames(self):
+        frames = [self.frame(count, seed=count) for count in (10, 0, 25)]
+        point_cloud_formats.write_container(self.path('capture.pcc'), frames)
+
+        container = point_cloud_formats.open_container(self.path('capture.pcc'))
+        self.assertEqual(3, len(container))
+        self.assertFalse(container.is_delta())
+        for number, (coords, indices) in enumerate(frames):
+            self.assertEqual(len(coords), container.point_count(number))
+            read_coords, read_indices = container.frame(number)
+            numpy.testing.assert_array_equal(coords, read_coords)
+            numpy.testing.assert_array_equal(indices, read_indices)
+
+    def test_index_offsets(self):
+        frames = [self.frame(count, seed=count) for count in (4, 6)]
+        point_cloud_formats.write_container(self.path('capture.pcc'), frames)
+
+        index = point_cloud_formats.open_container(self.path('capture.pcc')).index
+        header_size = point_cloud_formats.PCC_HEADER.size + 2 * point_cloud_formats.PCC_INDEX_DTYPE.itemsize
+        # every point takes 3 float32 coordinates and a uint32 idx value
+        self.assertEqual([header_size, header_size + 4 * 16], index['offset'].tolist())
+        self.assertEqual([4, 6], index['count'].tolist())
+
+    def test_without_indices(self):
+        frames = [self.frame(5)]
+        point_cloud_formats.write_container(self.path('capture.pcc'), frames, include_index=False)
+
+        coords, indices = point_cloud_formats.open_container(self.path('capture.pcc')).frame(0)
+        numpy.testing.assert_array_equal(frames[0][0], coords)
+        self.assertIsNone(indices)
+
+    def test_pack_sequence(self):
+        frames = [self.frame(count, seed=count) for count in (3, 8)]
+        for number, (coords, indices) in enumerate(frames):
+            point_cloud_formats.write_frame(self.path('frame{0}.pcf'.format(number)), coords, indices)
+
+        self.assertEqual(2, point_cloud_formats.pack_sequence(self.path('frame%d.pcf'), self.path('capture.pcc')))
+        container = point_cloud_formats.open_container(self.path('capture.pcc'))
+        for number, (coords, indices) in enumerate(frames):
+            numpy.testing.assert_array_equal(coords, container.frame(number)[0])
+            numpy.testing.assert_array_equal(indices, container.frame(number)[1])
+
+
+class TestSidecar(FormatTestCase):
+
+    def write_sequence(self):
+        with open(self.path('frame0.txt'), 'w') as f:
+            f.write('0,1,2,3\n1,-1,5,0.5\n2,0,0,0\n')
+        with open(self.path('frame1.txt'), 'w') as f:
+            f.write('0,4,4,4\n')
+        with open(self.path('frame2.txt'), 'w') as f:
+            f.write('')
+        return self.path('frame%d.txt')
+
+    def test_contents(self):
+        pattern = self.write_sequence()
+        point_cloud_formats.write_sidecar(pattern)
+
+        self.assertEqual(self.path('frame.txt.meta.json'), point_cloud_formats.sidecar_path(pattern))
+        metadata = point_cloud_formats.read_sidecar(pattern)
+        self.assertEqual(3, metadata['frames'])
+        self.assertEqual([3, 1, 0], metadata['counts'])
+        self.assertEqual([[-1, 0, 0], [4, 4, 4], None], metadata['min'])
+        self.assertEqual([[1, 5, 3], [4, 4, 4], None], metadata['max'])
+        self.assertEqual([-1, 0, 0], metadata['global_min'])
+        self.assertEqual([4, 5, 4], metadata['global_max'])
+
+    def test_small_chunks(self):
+        pattern = self.write_sequence()
+        self.assertEqual(point_cloud_formats.index_sequence(pattern), point_cloud_formats.index_sequence(pattern, chunk_size=1))
+
+    def test_container(self):
+        pattern = self.write_sequence()
+        point_cloud_formats.pack_sequence(pattern, self.path('capture.pcc'))
+        self.assertEqual(point_cloud_formats.index_sequence(pattern), point_cloud_formats.index_sequence(self.path('capture.pcc')))
+
+    def test_missing(self):
+        self.assertIsNone(point_cloud_formats.read_sidecar(self.path('frame%d.txt')))
+
+
+class TestDeltaContainer(FormatTestCase):
+
+    def sequence(self, count=7):
+        # a static scene in which some points move, and one point is missing from some frames
+        coords, indices = self.frame(50)
+        frames = []
+        for number in range(count):
+            moved = numpy.array(coords)
+            moved[number:number + 5] += number
+            keep = numpy.ones(len(coords), dtype=bool)
+            keep[10] = number % 2 == 0
+            frames.append((moved[keep], indices[keep]))
+        return frames
+
+    def test_frames(self):
+        frames = self.sequence()
+        point_cloud_formats.write_delta_container(self.path('delta.pcc'), frames, keyframe_interval=3)
+
+        container = point_cloud_formats.open_container(self.path('delta.pcc'))
+        self.assertTrue(container.is_delta())
+        self.assertEqual([0, 0, 0, 3, 3, 3, 6], [container.keyframe(number) for number in range(len(frames))])
+
+        for number, (coords, indices) in enumerate(frames):
+            read_coords, slots = container.frame(number)
+            # every idx value of the sequence has a slot; the points are in the slots of their idx value
+            numpy.testing.assert_array_equal(numpy.arange(50) * 2, slots)
+            numpy.testing.assert_array_equal(coords, read_coords[numpy.searchsorted(slots, indices)])
+
+    def test_only_changes_are_stored(self):
+        frames = self.sequence()
+        point_cloud_formats.write_delta_container(self.path('delta.pcc'), frames, keyframe_interval=3)
+
+        container = point_cloud_formats.open_container(self.path('delta.pcc'))
+        self.assertEqual(50, container.point_count(0))
+        self.assertEqual(0, len(container.delta(0)[0]))
+        # frame 1 moved points 1-5 (point 0 is back at its keyframe position) and is missing point 10
+        coords, slots = container.delta(1)
+        self.assertEqual([1, 2, 3, 4, 5, 10], slots.tolist())
+
+    def test_threshold(self):
+        frames = self.sequence(2)
+        coords, indices = frames[0]
+        frames[1] = (coords + 0.0001, indices)
+        point_cloud_formats.write_delta_container(self.path('delta.pcc'), frames, threshold=0.001)
+
+        container = point_cloud_formats.open_container(self.path('delta.pcc'))
+        self.assertEqual(0, container.point_count(1))
+        numpy.testing.assert_array_equal(container.frame(0)[0], container.frame(1)[0])
+
+    def test_needs_indices(self):
+        coords, _ = self.frame(5)
+        self.assertRaises(point_cloud_formats.FormatError, point_cloud_formats.write_delta_container, self.path('delta.pcc'), [(coords, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,447 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import point_cloud_formats
+from point_cloud_frames import PointCloudFrameCache, PointCloudFrameFile, PointCloudGridMesher, PointCloudSpatialIndex
+
+
+def read_like_original(path, skip=0, minBounds=None, maxBounds=None, offset=None, multiply=None):
+    # the line-by-line reader that PointCloudFrameFile replaced; gives (points, all points, rejected points)
+    points, all_points, rejected_points = [], [], []
+    with open(path) as f:
+        while True:
+            line = f.readline()
+            try:
+                idx, x, y, z = [100 * float(v) for v in line.split(',')]
+            except ValueError:
+                break
+
+            v = [x, y, z]
+            if multiply != None:
+                v = [v[i] * multiply[i] for i in range(3)]
+            if offset != None:
+                v = [v[i] + offset[i] for i in range(3)]
+
+            reject = (minBounds != None and any(v[i] < minBounds[i] for i in range(3))) or \
+                (maxBounds != None and any(v[i] > maxBounds[i] for i in range(3)))
+
+            all_points.append(tuple(v))
+            if reject:
+                rejected_points.append(tuple(v))
+            elif x * y * z != 0:
+                points.append(tuple(v))
+
+            for _ in range(skip):
+                f.readline()
+    return points, all_points, rejected_points
+
+
+class TestOriginalReader(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'frame0.txt')
+        random = numpy.random.RandomState(0)
+        coords = random.uniform(-0.05, 0.05, (200, 3))
+        coords[::9, 2] = 0.0
+        self.lines = ['{0},{1!r},{2!r},{3!r}\n'.format(idx, *point) for idx, point in enumerate(coords.tolist())]
+
+    def assertReadsLikeOriginal(self, lines, **settings):
+        with open(self.path, 'w') as f:
+            f.write(''.join(lines))
+        for skip in (0, 1, 2):
+            file = PointCloudFrameFile(self.path, skip=skip, **settings)
+            expected = read_like_original(self.path, skip=skip, **settings)
+            self.assertEqual(expected, (file.points, file.all_points, file.rejected_points))
+
+    def test_points(self):
+        self.assertReadsLikeOriginal(self.lines)
+
+    def test_settings(self):
+        self.assertReadsLikeOriginal(self.lines, minBounds=(-3, -4, -5), maxBounds=(5, 4, 3), offset=(1, -2, 0.5), multiply=(2, -1, 1))
+
+    def test_invalid_line(self):
+        lines = list(self.lines)
+        lines[99] = '99,1,x,3\n'
+        self.assertReadsLikeOriginal(lines)
+
+    def test_empty_lines(self):
+        lines = list(self.lines)
+        lines[50] = '\n'
+        self.assertReadsLikeOriginal(lines)
+        self.assertReadsLikeOriginal(['\n'] + self.lines)
+        self.assertReadsLikeOriginal(self.lines + ['\n', '  \n'])
+
+    def test_whitespace(self):
+        self.assertReadsLikeOriginal([line.replace(',', ', ').replace('\n', ' \r\n') for line in self.lines])
+
+    def test_without_final_line_end(self):
+        self.assertReadsLikeOriginal(self.lines[:-1] + [self.lines[-1].rstrip()])
+
+    def test_chunks(self):
+        lines = list(self.lines)
+        lines[101] = 'not a point\n'
+        with open(self.path, 'w') as f:
+            f.write(''.join(lines))
+        for skip in (0, 1, 2):
+            file = PointCloudFrameFile(self.path, skip=skip)
+            expected = read_like_original(self.path, skip=skip)[0]
+            self.assertEqual(expected, [tuple(point) for point in numpy.concatenate(list(file.iterChunks(16))).tolist()])
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.random = numpy.random.RandomState(3)
+
+    def assertQueriesMatchBruteForce(self, points, cell_size=None):
+        index = PointCloudSpatialIndex(points, cellSize=cell_size)
+        for _ in range(20):
+            minimum = self.random.uniform(-8.0, 8.0, 3)
+            maximum = minimum + self.random.uniform(0.0, 10.0, 3)
+            expected = numpy.nonzero(((points >= minimum) & (points <= maximum)).all(axis=1))[0]
+            numpy.testing.assert_array_equal(expected, index.box(minimum, maximum))
+
+            center = self.random.uniform(-5.0, 5.0, 3)
+            radius = self.random.uniform(0.0, 6.0)
+            expected = numpy.nonzero(((points - center) ** 2).sum(axis=1) <= radius * radius)[0]
+            numpy.testing.assert_array_equal(expected, index.radius(center, radius))
+
+    def test_queries(self):
+        for count in (1, 5, 1000, 20000):
+            self.assertQueriesMatchBruteForce(self.random.normal(0.0, 5.0, (count, 3)))
+
+    def test_cell_size(self):
+        self.assertQueriesMatchBruteForce(self.random.normal(0.0, 5.0, (1000, 3)), cell_size=0.5)
+
+    def test_empty(self):
+        index = PointCloudSpatialIndex(numpy.zeros((0, 3)))
+        self.assertEqual(0, len(index.box((-1, -1, -1), (1, 1, 1))))
+        self.assertEqual(0, len(index.radius((0, 0, 0), 1.0)))
+
+    def test_points_in_the_same_spot(self):
+        index = PointCloudSpatialIndex(numpy.ones((10, 3)))
+        numpy.testing.assert_array_equal(numpy.arange(10), index.box((0, 0, 0), (1, 1, 1)))
+        self.assertEqual(0, len(index.box((0, 0, 0), (0.5, 0.5, 0.5))))
+
+    def test_non_finite_points(self):
+        points = self.random.normal(0.0, 5.0, (1000, 3))
+        points[10, 0] = numpy.nan
+        points[20, 2] = numpy.inf
+        points[30] = -numpy.inf
+        self.assertQueriesMatchBruteForce(points)
+
+        index = PointCloudSpatialIndex(numpy.full((3, 3), numpy.nan))
+        self.assertEqual(0, len(index.box((-1, -1, -1), (1, 1, 1))))
+
+    def test_box_includes_its_sides(self):
+        index = PointCloudSpatialIndex(numpy.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0], [2.0, 2.0, 2.0]]))
+        numpy.testing.assert_array_equal([0, 1], index.box((0, 0, 0), (1, 1, 1)))
+
+
+class TestFrameFileQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'frame.pcf')
+        coords = numpy.random.RandomState(0).uniform(-0.05, 0.05, (2000, 3)).astype(numpy.float32)
+        point_cloud_formats.write_frame(self.path, coords, numpy.arange(2000))
+
+    def test_points_in_box(self):
+        file = PointCloudFrameFile(self.path)
+        points = file.get_points_array()
+        expected = points[((points >= -1.0) & (points <= 2.0)).all(axis=1)]
+        numpy.testing.assert_array_equal(expected, file.get_points_in_box((-1, -1, -1), (2, 2, 2)))
+
+    def test_points_in_radius(self):
+        file = PointCloudFrameFile(self.path)
+        points = file.get_points_array(4)
+        expected = points[((points - 1.0) ** 2).sum(axis=1) <= 9.0]
+        numpy.testing.assert_array_equal(expected, file.get_points_in_radius((1, 1, 1), 3.0, divisor=4))
+
+
+class TestIterChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        coords = numpy.random.RandomState(0).uniform(-0.05, 0.05, (1000, 3)).astype(numpy.float32)
+        coords[::7, 1] = 0.0 # points with a zero coordinate aren't active
+        self.binary = os.path.join(self.dir, 'frame.pcf')
+        point_cloud_formats.write_frame(self.binary, coords, numpy.arange(1000))
+        self.text = os.path.join(self.dir, 'frame0.txt')
+        with open(self.text, 'w') as f:
+            f.write(''.join('{0},{1!r},{2!r},{3!r}\n'.format(idx, *point) for idx, point in enumerate(coords.tolist())))
+
+    def files(self, **settings):
+        for path in (self.binary, self.text):
+            yield PointCloudFrameFile(path, minBounds=(-3, -4, -5), maxBounds=(5, 4, 3), **settings)
+
+    def assertChunksMatchLoadedPoints(self, chunk_size, **settings):
+        for file in self.files(**settings):
+            chunks = list(file.iterChunks(chunk_size, keepRejected=True, keepAll=True))
+            loaded = PointCloudFrameFile(file.path, minBounds=file.minBounds, maxBounds=file.maxBounds, **settings).load()
+
+            self.assertEqual([chunk_size] * (len(chunks) - 1), [len(chunk) for chunk in chunks[:-1]])
+            self.assertTrue(0 < len(chunks[-1]) <= chunk_size)
+            numpy.testing.assert_array_equal(loaded.get_points_array(), numpy.concatenate(chunks))
+            numpy.testing.assert_array_equal(loaded.get_all_points_array(), file.allPointsArray)
+            numpy.testing.assert_array_equal(loaded.rejectedPointsArray, file.rejectedPointsArray)
+
+    def test_chunks(self):
+        for chunk_size in (1, 64, 100, 5000):
+            self.assertChunksMatchLoadedPoints(chunk_size)
+
+    def test_skip(self):
+        self.assertChunksMatchLoadedPoints(64, skip=2)
+
+    def test_nothing_active(self):
+        file = PointCloudFrameFile(self.binary, minBounds=(10, 10, 10))
+        self.assertEqual([], list(file.iterChunks(64, keepAll=True)))
+        self.assertEqual(1000, len(file.allPointsArray))
+
+
+class TestCrop(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'frame.pcf')
+        self.coords = numpy.random.RandomState(0).uniform(-0.05, 0.05, (4000, 3)).astype(numpy.float32)
+        point_cloud_formats.write_frame(self.path, self.coords, numpy.arange(4000))
+
+    def assertCropped(self, points, indices, minimum, maximum, expected_points, expected_indices):
+        inside = ((expected_points >= minimum) & (expected_points <= maximum)).all(axis=1)
+        numpy.testing.assert_array_equal(expected_points[inside], points)
+        numpy.testing.assert_array_equal(expected_indices[inside], indices)
+
+    def test_index_is_built_when_cropped_again(self):
+        file = PointCloudFrameFile(self.path).load()
+        minimum, maximum = (-2.0, -1.0, 0.0), (3.0, 4.0, 5.0)
+
+        points, indices = file.get_cropped_points(minimum, maximum)
+        self.assertEqual({}, file.indexes)
+        self.assertCropped(points, indices, minimum, maximum, file.get_points_array(), file.get_point_indices())
+
+        points, indices = file.get_cropped_points(minimum, maximum)
+        self.assertEqual([1], list(file.indexes.keys()))
+        self.assertCropped(points, indices, minimum, maximum, file.get_points_array(), file.get_point_indices())
+
+    def test_crop_before_decimation(self):
+        file = PointCloudFrameFile(self.path)
+        file.decimation = 'TARGET'
+        file.targetPoints = 100
+        minimum, maximum = (0.0, 0.0, 0.0), (5.0, 5.0, 5.0)
+
+        for _ in range(2):
+            points, indices = file.get_cropped_points(minimum, maximum)
+            # about 500 of the 4000 points are inside the box; the target applies to those
+            self.assertEqual(100, len(points))
+            self.assertTrue(((points >= minimum) & (points <= maximum)).all())
+            numpy.testing.assert_array_equal(self.coords[indices].astype(numpy.float64) * 100.0, points)
+        self.assertIsNotNone(file.activeIndex)
+
+    def test_level_of_detail(self):
+        point_cloud_formats.write_frame(self.path, self.coords, numpy.arange(4000), lod=True)
+        file = PointCloudFrameFile(self.path)
+        minimum, maximum = (-5.0, -5.0, -5.0), (0.0, 5.0, 5.0)
+        for _ in range(2):
+            points, indices = file.get_cropped_points(minimum, maximum, divisor=4)
+            self.assertCropped(points, indices, minimum, maximum, file.get_points_array(4), file.get_point_indices(4))
+
+    def test_random_level_of_detail(self):
+        file = PointCloudFrameFile(self.path)
+        points, indices = file.get_cropped_points((-5.0, -5.0, -5.0), (0.0, 5.0, 5.0), divisor=4)
+        inside = len(file.get_cropped_points((-5.0, -5.0, -5.0), (0.0, 5.0, 5.0))[0])
+        self.assertEqual(int(numpy.ceil(inside / 4.0)), len(points))
+
+    def test_cache_size_counts_active_points_once(self):
+        file = PointCloudFrameFile(self.path).load()
+        self.assertIs(file.pointsArray, file.activePointsArray)
+        size = PointCloudFrameCache()._fileSize(file)
+
+        file.decimation = 'RANDOM'
+        file.decimationRatio = 0.5
+        file.loaded = False
+        file.load()
+        # the decimated points and their idx values are added; half the size of the active ones
+        self.assertEqual(size + 2000 * 32, PointCloudFrameCache()._fileSize(file))
+
+
+class TestDecimation(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'frame.pcf')
+        self.coords = numpy.random.RandomState(0).uniform(0.001, 0.1, (1000, 3)).astype(numpy.float32)
+        point_cloud_formats.write_frame(self.path, self.coords, numpy.arange(1000) * 2)
+
+    def decimated(self, decimation, **settings):
+        file = PointCloudFrameFile(self.path, scale=100.0)
+        file.decimation = decimation
+        for name, value in settings.items():
+            setattr(file, name, value)
+        return file.load()
+
+    def test_voxel(self):
+        file = self.decimated('VOXEL', voxelSize=2.5)
+        points = file.get_points_array()
+        # the first point of every occupied voxel, in file order
+        cells = numpy.floor(self.coords.astype(numpy.float64) * 100.0 / 2.5).astype(numpy.int64)
+        unused, first = numpy.unique(cells, axis=0, return_index=True)
+        numpy.testing.assert_array_equal(numpy.sort(first) * 2, file.get_point_indices())
+        self.assertEqual(len(first), len(points))
+        self.assertEqual(len(points), len(numpy.unique(numpy.floor(points / 2.5), axis=0)))
+
+    def test_random(self):
+        file = self.decimated('RANDOM', decimationRatio=0.25)
+        self.assertEqual(250, len(file.get_points_array()))
+        # the points keep their order and their idx values
+        indices = file.get_point_indices()
+        self.assertTrue((numpy.diff(indices) > 0).all())
+        numpy.testing.assert_array_equal(self.coords[indices // 2].astype(numpy.float64) * 100.0, file.get_points_array())
+
+    def test_target(self):
+        self.assertEqual(100, len(self.decimated('TARGET', targetPoints=100).get_points_array()))
+        self.assertEqual(1000, len(self.decimated('TARGET', targetPoints=5000).get_points_array()))
+        self.assertEqual(0, len(self.decimated('TARGET', targetPoints=0).get_points_array()))
+
+    def test_same_points_on_reload(self):
+        numpy.testing.assert_array_equal(
+            self.decimated('RANDOM', decimationRatio=0.1).get_point_indices(),
+            self.decimated('RANDOM', decimationRatio=0.1).get_point_indices())
+
+    def test_all_points_are_kept(self):
+        file = self.decimated('TARGET', targetPoints=10)
+        self.assertEqual(1000, len(file.get_all_points_array()))
+
+
+class TestGridMesher(unittest.TestCase):
+
+    def grid(self, width, height):
+        # points at the (column, row) of their pixel
+        indices = numpy.arange(width * height)
+        points = numpy.column_stack((indices % width, indices // width, numpy.zeros(len(indices))))
+        return points.astype(numpy.float32), indices
+
+    def test_full_grid(self):
+        # 0 1 2
+        # 3 4 5
+        points, indices = self.grid(3, 2)
+        triangles = PointCloudGridMesher(width=3).triangles(points, indices)
+        self.assertEqual([[0, 3, 1], [1, 4, 2], [1, 3, 4], [2, 4, 5]], triangles.tolist())
+        self.assertEqual(numpy.int32, triangles.dtype)
+
+    def test_missing_pixel(self):
+        points, indices = self.grid(3, 2)
+        keep = indices != 4
+        triangles = PointCloudGridMesher(width=3).triangles(points[keep], indices[keep])
+        # the triangles refer to points, not pixels; the point of pixel 5 is point 4
+        self.assertEqual([[0, 3, 1]], triangles.tolist())
+
+    def test_rows_dont_wrap(self):
+        points, indices = self.grid(2, 2)
+        self.assertEqual([[0, 2, 1], [1, 2, 3]], PointCloudGridMesher(width=2).triangles(points, indices).tolist())
+
+    def test_points_in_any_order(self):
+        points, indices = self.grid(3, 2)
+        order = numpy.array([5, 2, 0, 4, 1, 3])
+        triangles = PointCloudGridMesher(width=3).triangles(points[order], indices[order])
+        self.assertEqual([[0, 3, 1], [1, 4, 2], [1, 3, 4], [2, 4, 5]], indices[order][triangles].tolist())
+
+    def test_max_edge_length(self):
+        points, indices = self.grid(3, 2)
+        points[5, 2] = 10.0
+        triangles = PointCloudGridMesher(width=3, maxEdgeLength=1.5).triangles(points, indices)
+        self.assertEqual([[0, 3, 1], [1, 4, 2], [1, 3, 4]], triangles.tolist())
+
+    def test_empty(self):
+        points, indices = self.grid(3, 2)
+        self.assertEqual((0, 3), PointCloudGridMesher(width=3).triangles(points[:0], indices[:0]).shape)
+        self.assertEqual((0, 3), PointCloudGridMesher(width=1).triangles(points, indices).shape)
+
+
+class TestFrameCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def loaded(self, name, count=600, **kwargs):
+        path = os.path.join(self.dir, name + '.pcf')
+        if not os.path.exists(path):
+            coords = numpy.random.RandomState(count).uniform(-0.05, 0.05, (count, 3)).astype(numpy.float32)
+            point_cloud_formats.write_frame(path, coords, numpy.arange(count))
+        return PointCloudFrameFile(path, **kwargs).load()
+
+    def test_get(self):
+        cache = PointCloudFrameCache()
+        file = self.loaded('a')
+        self.assertIsNone(cache.get(file))
+        cache.put(file)
+        self.assertIs(file, cache.get(self.loaded('a')))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_settings_are_part_of_the_key(self):
+        cache = PointCloudFrameCache()
+        cache.put(self.loaded('a'))
+        self.assertFalse(cache.contains(PointCloudFrameFile(os.path.join(self.dir, 'a.pcf'), scale=1.0)))
+
+    def test_modified_files_are_not_used(self):
+        cache = PointCloudFrameCache()
+        file = self.loaded('a')
+        cache.put(file)
+        mtime = os.path.getmtime(file.path)
+        os.utime(file.path, (mtime + 10, mtime + 10))
+        self.assertIsNone(cache.get(file))
+
+    def test_evicts_least_recently_used(self):
+        # every file takes 600 points * (3 float64 points + 3 float64 all points + an int64 idx) = 33600 bytes
+        cache = PointCloudFrameCache(budgetMB=0.1)
+        a, b, c, d = [self.loaded(name) for name in 'abcd']
+        for file in (a, b, c):
+            cache.put(file)
+        self.assertEqual(3 * 33600, cache.size)
+
+        cache.get(a)
+        cache.put(d)
+        self.assertEqual([True, False, True, True], [cache.contains(file) for file in (a, b, c, d)])
+        self.assertEqual(3 * 33600, cache.size)
+
+    def test_too_large(self):
+        cache = PointCloudFrameCache(budgetMB=0.01)
+        cache.put(self.loaded('a'))
+        self.assertEqual(0, len(cache.files))
+        self.assertEqual(0, cache.size)
+
+    def test_put_measures_again(self):
+        cache = PointCloudFrameCache(budgetMB=0.1)
+        a, b, c = [self.loaded(name) for name in 'abc']
+        for file in (a, b, c):
+            cache.put(file)
+
+        # a level of detail and its spatial index were added to a; the least recently used file makes room
+        a.spatialIndex(2)
+        cache.put(a)
+        self.assertEqual([True, False, True], [cache.contains(file) for file in (a, b, c)])
+        self.assertEqual(sum(cache.sizes.values()), cache.size)
+        self.assertGreater(cache.sizes[cache._key(a)], 33600)
+
+    def test_set_budget(self):
+        cache = PointCloudFrameCache()
+        a, b = self.loaded('a'), self.loaded('b')
+        cache.put(a)
+        cache.put(b)
+        cache.setBudget(0.05)
+        self.assertEqual([False, True], [cache.contains(file) for file in (a, b)])
+
+
+if __name__ == '__main__':
+    unittest.main()
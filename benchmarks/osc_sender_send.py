@@ -0,0 +1,56 @@
+# Compares the number of messages per second OscSender.send can send with its fast path
+# (messages packed with a cached template per address and argument types) to building every
+# message with pythonosc's OscMessageBuilder (the way OscSender.send used to do it).
+# The messages are sent to a local UDP socket that doesn't read them.
+#
+# Run this benchmark with python 3 (blender isn't needed):
+#   python benchmarks/osc_sender_send.py
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'addons', 'modules'))
+
+from osc_sender import OscSender, build_message
+
+MESSAGES = 100000
+# (address, arguments) of the messages, like the ones bl2030 sends for object properties
+SAMPLES = [
+  ('/scene/light/intensity', [0.75]),
+  ('/scene/camera/fov', [54.0]),
+  ('/scene/cue', [3]),
+  ('/scene/position', [0.5, 1.25, -2.0])]
+
+def sendFast(sender, messages):
+  for addr, params in messages:
+    sender.send(addr, params)
+
+def sendBuilder(sender, messages):
+  for addr, params in messages:
+    sender._send(build_message(addr, params), addr)
+
+def messagesPerSecond(fn, sender, messages):
+  start = time.perf_counter()
+  fn(sender, messages)
+  return len(messages) / (time.perf_counter() - start)
+
+def run():
+  receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+  receiver.bind(('127.0.0.1', 0))
+  sender = OscSender({'host': '127.0.0.1', 'port': receiver.getsockname()[1]})
+  sender.setup()
+
+  messages = [SAMPLES[idx % len(SAMPLES)] for idx in range(MESSAGES)]
+  builder = messagesPerSecond(sendBuilder, sender, messages)
+  fast = messagesPerSecond(sendFast, sender, messages)
+
+  print("{0} messages".format(MESSAGES))
+  print("{0:>26} {1:>12.0f}".format("OscMessageBuilder (msg/s)", builder))
+  print("{0:>26} {1:>12.0f} {2:>8.1f}x".format("fast path (msg/s)", fast, fast / builder))
+
+  sender.destroy()
+  receiver.close()
+
+if __name__ == "__main__":
+  run()
@@ -0,0 +1,70 @@
+# Shows how the time to load a point cloud frame scales with the number of point cloud objects,
+# comparing a full scene update after writing every object's mesh (the way
+# PointCloudObjectFrameLoader.createPoints used to do it) with tagging all changed
+# meshes for an update once, after all meshes were written (the way PointCloudLoader does it now).
+#
+# Run this benchmark inside blender:
+#   blender --background --factory-startup --python benchmarks/point_cloud_scene_update.py
+import time
+
+import bpy
+import numpy
+
+OBJECT_COUNTS = (1, 2, 4, 8, 16)
+POINTS = 100000
+FRAMES = 5
+
+def createObjects(scene, count):
+  objs = []
+  for idx in range(count):
+    mesh = bpy.data.meshes.new("benchmark")
+    mesh.vertices.add(POINTS)
+    obj = bpy.data.objects.new("benchmark", mesh)
+    scene.objects.link(obj)
+    objs.append(obj)
+  return objs
+
+def removeObjects(scene, objs):
+  for obj in objs:
+    mesh = obj.data
+    scene.objects.unlink(obj)
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+def frameCoordinates(frame):
+  return numpy.random.RandomState(frame).uniform(-10.0, 10.0, POINTS * 3).astype(numpy.float32)
+
+def loadPerObjectSceneUpdate(scene, objs, coords):
+  for obj in objs:
+    obj.data.vertices.foreach_set("co", coords)
+    scene.update()
+
+def loadTaggedMeshes(scene, objs, coords):
+  for obj in objs:
+    obj.data.vertices.foreach_set("co", coords)
+  for obj in objs:
+    obj.data.update()
+  # blender evaluates the tagged meshes once, after the frame change handlers
+  scene.update()
+
+def timeFrames(fn, scene, objs):
+  frames = [frameCoordinates(frame) for frame in range(FRAMES)]
+  start = time.perf_counter()
+  for coords in frames:
+    fn(scene, objs, coords)
+  return (time.perf_counter() - start) / FRAMES
+
+def run():
+  scene = bpy.context.scene
+  print("{0} points per object, average over {1} frames".format(POINTS, FRAMES))
+  print("{0:>8} {1:>22} {2:>18} {3:>9}".format("objects", "per-object update (s)", "tagged meshes (s)", "speedup"))
+
+  for count in OBJECT_COUNTS:
+    objs = createObjects(scene, count)
+    perObject = timeFrames(loadPerObjectSceneUpdate, scene, objs)
+    tagged = timeFrames(loadTaggedMeshes, scene, objs)
+    removeObjects(scene, objs)
+    print("{0:>8} {1:>22.4f} {2:>18.4f} {3:>8.1f}x".format(count, perObject, tagged, perObject / tagged))
+
+if __name__ == "__main__":
+  run()
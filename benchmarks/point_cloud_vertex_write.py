@@ -0,0 +1,71 @@
+# Compares writing point cloud coordinates to a mesh one vertex at a time
+# (the way PointCloudObjectFrameLoader.createPoints used to do it)
+# with the bulk foreach_set path that createPoints uses now, and reports the crossover for
+# delta updates: below what fraction of changed vertices setting them one by one is faster
+# than rewriting all of them (PointCloudDeltaUpdater measures this while updating).
+#
+# Run this benchmark inside blender:
+#   blender --background --factory-startup --python benchmarks/point_cloud_vertex_write.py
+import time
+
+import bpy
+import numpy
+
+SIZES = (10000, 100000, 1000000)
+REPEAT = 3
+
+def randomCoordinates(count):
+  return numpy.random.RandomState(0).uniform(-10.0, 10.0, (count, 3)).astype(numpy.float32)
+
+def writePerVertex(mesh, points):
+  # the old per-vertex path; it works on a list of tuples, like the old parser output
+  idx = 0
+  for point in points:
+    mesh.vertices[idx].co = (point[0], point[1], point[2])
+    idx += 1
+
+def writeBulk(mesh, coords):
+  mesh.vertices.foreach_set("co", coords.reshape(-1))
+
+def writeChanged(mesh, slots, coords):
+  # the per-vertex path of PointCloudDeltaUpdater._writeVertices
+  vertices = mesh.vertices
+  for slot, co in zip(slots.tolist(), coords[slots].tolist()):
+    vertices[slot].co = co
+
+def best(fn, *args):
+  result = None
+  for i in range(REPEAT):
+    start = time.perf_counter()
+    fn(*args)
+    duration = time.perf_counter() - start
+    result = duration if result == None else min(result, duration)
+  return result
+
+def run():
+  print("{0:>10} {1:>15} {2:>15} {3:>9} {4:>13}".format("points", "per-vertex (s)", "foreach_set (s)", "speedup", "crossover"))
+
+  for count in SIZES:
+    coords = randomCoordinates(count)
+    points = [tuple(p) for p in coords.tolist()]
+
+    mesh = bpy.data.meshes.new("benchmark")
+    mesh.vertices.add(count)
+
+    perVertex = best(writePerVertex, mesh, points)
+    bulk = best(writeBulk, mesh, coords)
+
+    # sanity check; both paths should produce the same mesh
+    check = numpy.zeros(count * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get("co", check)
+    assert numpy.allclose(check, coords.reshape(-1))
+
+    # the time of writing 1% of the vertices one by one, which scales linearly with the number of vertices
+    slots = numpy.random.RandomState(1).choice(count, count // 100, replace=False)
+    changed = best(writeChanged, mesh, slots, coords)
+
+    bpy.data.meshes.remove(mesh)
+    print("{0:>10} {1:>15.4f} {2:>15.4f} {3:>8.1f}x {4:>12.2f}%".format(count, perVertex, bulk, perVertex / bulk, bulk / changed))
+
+if __name__ == "__main__":
+  run()
@@ -0,0 +1,52 @@
+# Bakes the point cloud frames of an object into binary frame files with the final points,
+# using the object's Point Cloud Loader settings (see PointCloudSequenceBaker in
+# addons/blender_point_cloud_loader.py). Point the object's Data Files setting at the
+# baked files to load them without any parsing or processing.
+#
+# Run this script with blender, in the background:
+#   blender --background scene.blend --python scripts/bake_point_cloud.py -- --object Kinect --output baked/frame%d.pcf
+#
+# Ranges of frames can be baked in parallel by separate processes (or render nodes):
+#   blender --background scene.blend --python scripts/bake_point_cloud.py -- --object Kinect --output baked/frame%d.pcf --start 0 --end 2499
+#   blender --background scene.blend --python scripts/bake_point_cloud.py -- --object Kinect --output baked/frame%d.pcf --start 2500 --end 4999
+import argparse
+import os.path
+import sys
+
+import bpy
+
+# use the addon from this repository when it isn't installed
+addonsPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addons")
+for path in (addonsPath, os.path.join(addonsPath, "modules")):
+  if path not in sys.path:
+    sys.path.append(path)
+
+import blender_point_cloud_loader
+
+def parseArguments():
+  # blender's own arguments come before the "--"
+  argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+  parser = argparse.ArgumentParser(description="Bake point cloud frames into binary frame files")
+  parser.add_argument("--object", required=True, help="name of the object with the Point Cloud Loader settings")
+  parser.add_argument("--output", required=True, help="path of the baked files, with %%d for the frame number (relative to the blend file)")
+  parser.add_argument("--start", type=int, default=0, help="first point cloud frame to bake")
+  parser.add_argument("--end", type=int, default=None, help="last point cloud frame to bake (defaults to the last frame)")
+  return parser.parse_args(argv)
+
+def run():
+  args = parseArguments()
+
+  if hasattr(bpy.types.Object, "pointCloudLoaderConfig") != True:
+    blender_point_cloud_loader.register()
+
+  obj = bpy.data.objects.get(args.object)
+  if obj == None:
+    print("Couldn't find object: " + args.object)
+    sys.exit(1)
+
+  baker = blender_point_cloud_loader.PointCloudSequenceBaker(obj, scene=bpy.context.scene)
+  baker.bake(args.output, start=args.start, end=args.end)
+
+if __name__ == "__main__":
+  run()